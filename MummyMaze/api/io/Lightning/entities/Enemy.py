@@ -4,83 +4,31 @@ import random
 from collections import deque
 from enum import Enum
 from api.io.Lightning.entities.EntityLoader import Entity
+from api.io.Lightning.entities.EnemyMoveTable import STRENGTH
 from api.io.Lightning.manager.SoundReader import sfx_manager
 from api.io.Lightning.utils.ConfigFile import ENTITIES_PATH, maze_coord_x, maze_coord_y, UI_PATH, OBJECTS_PATH
-from api.io.Lightning.utils.Pathfinder import Pathfinder
-
-class EnemyAI:
-    def __init__(self, maze_size, walls, gate=None):
-        self.maze_size = maze_size
-        self.walls = walls
-        self.gate = gate
-
-    def _is_valid_move_callback(self, curr, nxt):
-        return Entity.validate_move(curr[0], curr[1], nxt[0], nxt[1], self.maze_size, self.walls, self.gate)
-
-    def _is_valid_move(self, from_pos, to_pos):
-        return Entity.validate_move(from_pos[0], from_pos[1], to_pos[0], to_pos[1], self.maze_size, self.walls, self.gate)
-
-    def _get_classic_path(self, start_pos, target_pos, steps, priority="horizontal"):
-        path = []
-        cur_x, cur_y = start_pos
-        target_x, target_y = target_pos
-        for _ in range(steps):
-            dist_x = target_x - cur_x
-            dist_y = target_y - cur_y
-            moved = False
-            check = [('x', dist_x), ('y', dist_y)] if priority == "horizontal" else [('y', dist_y), ('x', dist_x)]
-            
-            for axis, dist in check:
-                if axis == 'x' and dist != 0:
-                    nx = cur_x + (1 if dist > 0 else -1)
-                    if self._is_valid_move([cur_x, cur_y], [nx, cur_y]):
-                        cur_x = nx; path.append([cur_x, cur_y]); moved = True; break
-                elif axis == 'y' and dist != 0:
-                    ny = cur_y + (1 if dist > 0 else -1)
-                    if self._is_valid_move([cur_x, cur_y], [cur_x, ny]):
-                        cur_y = ny; path.append([cur_x, cur_y]); moved = True; break
-            if not moved: break
-        return path
-
-    def get_move_path(self, enemy, player_pos, difficulty='medium'):
-        etype = enemy['type']
-        curr = enemy['pos']
-        # Hard Mode: Red Scorpion dùng A*
-        if difficulty == 'hard' and 'red_scorpion' in etype:
-            path = Pathfinder.astar_search(curr, player_pos, self.maze_size, self._is_valid_move_callback)
-            if path: return path[:1]
-            return []
-
-        steps = 2 if 'mummy' in etype else 1
-        if etype == 'white_mummy': return self._get_classic_path(curr, player_pos, steps, "horizontal")
-        elif etype == 'red_mummy': return self._get_classic_path(curr, player_pos, steps, "vertical")
-        else: return self._get_classic_path(curr, player_pos, 1, "horizontal")
-        return []
 
 class EnemyState(Enum):
     IDLE = "idle"; WALK = "walk"; DIE = "die"
     AFK_LISTEN = "listen"; AFK_DANCE = "dance"; AFK_SPIN = "spin"
 
 class Enemy(Entity):
-    def __init__(self, x, y, enemy_type, maze_size, tile_size, walls, gate=None):
+    def __init__(self, x, y, enemy_type, maze_size, tile_size):
         super().__init__(x, y)
         self.type = enemy_type; self.maze_size = maze_size; self.tile_size = tile_size
-        self.ai = EnemyAI(maze_size, walls, gate)
         self.state = EnemyState.IDLE; self.direction = 'down'
         self.is_dead = False; self.strength = 0; self._set_stats()
         self.pixel_x = x * tile_size; self.pixel_y = y * tile_size
         self.target_x = self.pixel_x; self.target_y = self.pixel_y
         self.move_queue = deque(); self.move_speed = 3; self.is_moving = False
         self.paused = False; self.is_retreating = False; self.locked_direction = None
+        self.occupancy = None
         self.is_turning = False; self.turn_timer = 0; self.current_walk_variant = None
         self.last_afk_time = 0; self.frame_index = 0; self.animation_speed = 0.05
         self.last_update_time = pygame.time.get_ticks(); self.animations = {}; self._load_assets()
 
     def _set_stats(self):
-        if self.type == 'scorpion': self.strength = 1
-        elif self.type == 'red_scorpion': self.strength = 2
-        elif self.type == 'white_mummy': self.strength = 3
-        elif self.type == 'red_mummy': self.strength = 4
+        self.strength = STRENGTH.get(self.type, 0)
 
     def _load_assets(self):
         def load_img(name):
@@ -120,12 +68,6 @@ class Enemy(Entity):
             self.animations[EnemyState.AFK_SPIN] = load_strip(load_img(f"{pre}spin")) or load_strip(load_img("whitespin"))
         self.animations[EnemyState.DIE] = load_strip(load_img("dust"))
 
-    def move_logic(self, player_pos, difficulty='medium'):
-        if self.state == EnemyState.DIE: return
-        path = self.ai.get_move_path({'type': self.type, 'pos': [self.x, self.y]}, player_pos, difficulty)
-        for step in path:
-            if step != [self.x, self.y]: self.move_queue.append(step)
-
     def face_target(self, target_x, target_y):
         if self.is_dead: return
         dx = target_x - self.x; dy = target_y - self.y
@@ -168,6 +110,7 @@ class Enemy(Entity):
                 elif dy < 0: self.direction = 'up'
             elif self.locked_direction: self.direction = self.locked_direction
             self.x, self.y = next_pos
+            if self.occupancy: self.occupancy.move(self)
             self.target_x = self.x * self.tile_size; self.target_y = self.y * self.tile_size
             self.is_moving = True; self.state = EnemyState.WALK; self.is_turning = False
 
@@ -0,0 +1,89 @@
+from array import array
+from api.io.Lightning.utils.Pathfinder import FlowFields
+
+# Row of each enemy type inside the flat tables
+TYPE_INDEX = {'scorpion': 0, 'red_scorpion': 1, 'white_mummy': 2, 'red_mummy': 3}
+# Fight strength, the stronger enemy survives when two meet
+STRENGTH = {'scorpion': 1, 'red_scorpion': 2, 'white_mummy': 3, 'red_mummy': 4}
+UNSET = 0xFFFF
+
+
+class EnemyMoveTable:
+    """
+    Enemy moves for one level, memoized in flat arrays of size
+    types x N^2 x N^2 x 2, indexed by (type, enemy cell, player cell, gate open).
+
+    `dest` holds where the enemy ends its turn, `first` its first step (only
+    differs from `dest` for mummies, which walk two steps). Entries are filled
+    the first time they are looked up, or all at once with `fill()`.
+    """
+    def __init__(self, grid, difficulty='medium'):
+        self.grid = grid
+        self.size = grid.size
+        self.cells = grid.size * grid.size
+        self.hard = (difficulty == 'hard')
+        self.dest = array('H', [UNSET]) * (len(TYPE_INDEX) * self.cells * self.cells * 2)
+        self.first = array('H', [UNSET]) * len(self.dest)
+
+    @staticmethod
+    def for_grid(grid, difficulty='medium'):
+        """One shared table per level grid and difficulty mode."""
+        mode = 'hard' if difficulty == 'hard' else 'classic'
+        if mode not in grid.move_tables: grid.move_tables[mode] = EnemyMoveTable(grid, difficulty)
+        return grid.move_tables[mode]
+
+    def index(self, etype, ecell, pcell, gate_open):
+        return ((TYPE_INDEX.get(etype, 0) * self.cells + ecell) * self.cells + pcell) * 2 + (1 if gate_open else 0)
+
+    def destination(self, etype, ecell, pcell, gate_open):
+        i = self.index(etype, ecell, pcell, gate_open)
+        if self.dest[i] == UNSET: self._compute(i, etype, ecell, pcell, gate_open)
+        return self.dest[i]
+
+    def path(self, etype, ecell, pcell, gate_open):
+        """Cells the enemy walks through this turn (0, 1 or 2 of them)."""
+        i = self.index(etype, ecell, pcell, gate_open)
+        if self.dest[i] == UNSET: self._compute(i, etype, ecell, pcell, gate_open)
+        first, dest = self.first[i], self.dest[i]
+        if first == ecell: return []
+        return [first] if first == dest else [first, dest]
+
+    def fill(self, etypes=None):
+        """Computes every entry for the given types (all types by default)."""
+        for etype in (etypes or TYPE_INDEX):
+            for ecell in range(self.cells):
+                for pcell in range(self.cells):
+                    for gate_open in (False, True):
+                        self.destination(etype, ecell, pcell, gate_open)
+        return self
+
+    def _compute(self, i, etype, ecell, pcell, gate_open):
+        if self.hard and etype == 'red_scorpion':
+            first = self._chase_step(ecell, pcell, gate_open)
+            dest = first
+        elif 'mummy' in etype:
+            priority = "vertical" if etype == 'red_mummy' else "horizontal"
+            first = self._greedy_step(ecell, pcell, gate_open, priority)
+            dest = self._greedy_step(first, pcell, gate_open, priority) if first != ecell else first
+        else:
+            first = self._greedy_step(ecell, pcell, gate_open, "horizontal")
+            dest = first
+        self.first[i] = first
+        self.dest[i] = dest
+
+    def _greedy_step(self, ecell, pcell, gate_open, priority):
+        size = self.size
+        cx, cy = ecell % size, ecell // size
+        tx, ty = pcell % size, pcell // size
+        dist_x, dist_y = tx - cx, ty - cy
+        check = [('x', dist_x), ('y', dist_y)] if priority == "horizontal" else [('y', dist_y), ('x', dist_x)]
+        for axis, dist in check:
+            if dist == 0: continue
+            step = 1 if dist > 0 else -1
+            nx, ny = (cx + step, cy) if axis == 'x' else (cx, cy + step)
+            if self.grid.can_move(cx, cy, nx, ny, gate_open): return ny * size + nx
+        return ecell
+
+    def _chase_step(self, ecell, pcell, gate_open):
+        """Shortest-path step towards the player, read from the shared flow field of the player cell."""
+        return FlowFields.for_grid(self.grid).next_step(ecell, pcell, gate_open)
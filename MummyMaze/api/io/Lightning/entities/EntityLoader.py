@@ -1,4 +1,5 @@
 import pygame
+from api.io.Lightning.utils.WallGrid import WallGrid
 
 
 class Entity:
@@ -45,6 +46,7 @@ class Entity:
     def validate_move(start_x, start_y, end_x, end_y, maze_size, walls, gate=None):
         """
         Static method to check if a move from (start_x, start_y) to (end_x, end_y) is valid.
+        `walls` should be the level's WallGrid; a raw wall list is indexed on the fly.
         """
         # 1. Check Map Boundaries
         if not (0 <= end_x < maze_size and 0 <= end_y < maze_size):
@@ -67,25 +69,9 @@ class Entity:
             if start_x == gx and start_y == gy and end_x == gx and end_y == gy - 1:
                 return False
 
-        # 3. Check Wall Collision
-        # Moving RIGHT
-        if end_x > start_x:
-            for w in walls:
-                if w['x'] == end_x and w['y'] == end_y and w['dir'] in ['vertical', 'both']: return False
-        # Moving LEFT
-        elif end_x < start_x:
-            for w in walls:
-                if w['x'] == start_x and w['y'] == start_y and w['dir'] in ['vertical', 'both']: return False
-        # Moving DOWN
-        elif end_y > start_y:
-            for w in walls:
-                if w['x'] == end_x and w['y'] == end_y and w['dir'] in ['horizontal', 'both']: return False
-        # Moving UP
-        elif end_y < start_y:
-            for w in walls:
-                if w['x'] == start_x and w['y'] == start_y and w['dir'] in ['horizontal', 'both']: return False
-
-        return True
+        # 3. Check Wall Collision (O(1) lookup in the level's wall index)
+        grid = WallGrid.of(walls, maze_size)
+        return not grid.has_wall(start_x, start_y, end_x, end_y)
 
     def check_eligible_move(self, new_x, new_y, maze_size, walls, gate=None):
         """Wrapper for instance-based check"""
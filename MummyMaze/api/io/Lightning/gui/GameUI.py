@@ -5,6 +5,7 @@ from api.io.Lightning.gui.MapTracker import WorldMapPanel
 from api.io.Lightning.manager.SoundReader import sfx_manager, music_manager
 from api.io.Lightning.manager.TextDesigner import TextDesigner
 from api.io.Lightning.maze.MazeLoader import MazeLoader
+from api.io.Lightning.solver.LevelModel import FIGHT, CAUGHT, TRAPPED, WON
 from api.io.Lightning.listener.AnimatedListener import initialize_torch_animation
 from api.io.Lightning.utils.ConfigFile import *
 from api.io.Lightning.manager.ButtonManager import ButtonManager
@@ -70,6 +71,7 @@ def initialize_ui(mode="random", level_id=1, size=8, difficulty="medium", saved_
     
     _maze_size = size
     _reset_runtime_state(full_reset=True)
+    if _maze_loader: _maze_loader.cancel_solvability_check(); _maze_loader.cancel_tablebase()
     _button_manager = ButtonManager()
     _torch_animation = initialize_torch_animation()
     sfx_manager.initialize()
@@ -240,13 +242,11 @@ def _check_options_click(mouse_pos):
 def _execute_player_move(dx, dy):
     global _player, _maze_loader, _turn_state, _steps_taken
     if not _player.is_ready(): return
-    if dx == 0 and dy == 0:
-        _maze_loader.save_state(_player); _player.move_player(0, 0); _turn_state = TurnState.ENEMY_TURN; _maze_loader.init_enemy_turn_sequence(); return
-    tx = _player.x + dx; ty = _player.y + dy
-    for e in _maze_loader.enemies_list:
-        if e.x == tx and e.y == ty: return
-    if _player.check_eligible_move(tx, ty, _maze_loader.maze_size, _maze_loader.parsed["walls"], _maze_loader.gate_obj):
-        _maze_loader.save_state(_player); _player.move_player(dx, dy); _steps_taken += 1; _turn_state = TurnState.PLAYER_MOVING
+    # The whole turn is resolved up front; the states below only play its events back
+    if not _maze_loader.play_turn(_player, dx, dy): return
+    _maze_loader.cancel_solvability_check(); _maze_loader.save_state(_player); _player.move_player(dx, dy)
+    if dx or dy: _steps_taken += 1
+    _turn_state = TurnState.PLAYER_MOVING
 
 def restart_level():
     global _player, _maze_loader, _turn_state; _reset_runtime_state(full_reset=True)
@@ -264,13 +264,6 @@ def undo_move():
 def reset_input():
     if _button_manager: _button_manager.clear_clicked()
 
-def _is_win():
-    global _maze_loader, _player
-    if not _maze_loader or not _player: return False
-    win = _maze_loader.get_win_cell()
-    if not win: return False
-    return (_player.x == win[0] and _player.y == win[1])
-
 def draw_screen(screen, hovered=None, clicked=None, draw_mumlogo=True, mumlogo_y=None):
     global _torch_animation, _maze_loader, _player, _turn_state, _death_step, _death_step_timer, _fight_pause_timer, _killer_ref
     snake, mumlogo = _get_ui_images()
@@ -278,25 +271,22 @@ def draw_screen(screen, hovered=None, clicked=None, draw_mumlogo=True, mumlogo_y
         _player.update(); _maze_loader.update()
         if _turn_state == TurnState.PLAYER_MOVING:
             if not _player.is_moving:
-                _maze_loader.check_key_collision(_player.x, _player.y)
-                if _maze_loader.check_trap_collision(_player.x, _player.y): _maze_loader.pause_enemies(); _player.state = PlayerState.DIE_TRAP; _player.frame_index = 0; _turn_state = TurnState.PLAYER_DYING; _death_step = 3; _death_step_timer = 0; _killer_ref = None; return None
-                if _is_win():
+                outcome = _maze_loader.play_player_events()
+                if outcome == TRAPPED: _maze_loader.pause_enemies(); _player.state = PlayerState.DIE_TRAP; _player.frame_index = 0; _turn_state = TurnState.PLAYER_DYING; _death_step = 3; _death_step_timer = 0; _killer_ref = None; return None
+                if outcome == WON:
                     elapsed_ms = pygame.time.get_ticks() - _level_start_time
                     # --- CÔNG THỨC TÍNH ĐIỂM CHUẨN ---
                     score = max(0, 10000 - (elapsed_ms // 100) - (_steps_taken * 50))
                     return ("win", score, elapsed_ms)
-                _turn_state = TurnState.ENEMY_TURN; _maze_loader.init_enemy_turn_sequence()
+                _turn_state = TurnState.ENEMY_TURN
         elif _turn_state == TurnState.ENEMY_TURN:
             for e in _maze_loader.enemies_list: e.prev_x = e.x; e.prev_y = e.y
             _maze_loader.init_enemy_turn_sequence(); _turn_state = TurnState.ENEMY_MOVING
         elif _turn_state == TurnState.ENEMY_MOVING:
-            kill = False
-            for e in _maze_loader.enemies_list:
-                if e.x == _player.x and e.y == _player.y: sfx_manager.play("pummel"); e.move_queue.clear(); _killer_ref = e; _maze_loader.spawn_fight_cloud(_player.x, _player.y); _killer_ref.face_target(_player.x, _player.y); _turn_state = TurnState.PLAYER_DYING; _death_step = 1; _death_step_timer = pygame.time.get_ticks(); kill = True; break
-            if not kill:
-                if _maze_loader.resolve_enemy_collisions(): _maze_loader.pause_enemies(); _turn_state = TurnState.FIGHT_PAUSE; _fight_pause_timer = pygame.time.get_ticks()
-                else:
-                    if _maze_loader.update_turn_sequence(_player.get_pos()): _maze_loader.face_enemies_to_player(_player); _turn_state = TurnState.PLAYER_INPUT; _player.last_input_time = pygame.time.get_ticks(); _maze_loader.check_solvability(_player)
+            outcome = _maze_loader.update_turn_sequence()
+            if outcome == CAUGHT: sfx_manager.play("pummel"); _killer_ref = _maze_loader.turn_killer; _killer_ref.move_queue.clear(); _maze_loader.spawn_fight_cloud(_player.x, _player.y); _killer_ref.face_target(_player.x, _player.y); _turn_state = TurnState.PLAYER_DYING; _death_step = 1; _death_step_timer = pygame.time.get_ticks()
+            elif outcome == FIGHT: _maze_loader.pause_enemies(); _turn_state = TurnState.FIGHT_PAUSE; _fight_pause_timer = pygame.time.get_ticks()
+            elif outcome: _maze_loader.face_enemies_to_player(_player); _turn_state = TurnState.PLAYER_INPUT; _player.last_input_time = pygame.time.get_ticks(); _maze_loader.check_solvability(_player)
         elif _turn_state == TurnState.FIGHT_PAUSE:
             if pygame.time.get_ticks() - _fight_pause_timer > 500: _maze_loader.process_pending_deaths(); _maze_loader.resume_enemies(); _turn_state = TurnState.ENEMY_MOVING
         elif _turn_state == TurnState.PLAYER_DYING:
@@ -306,7 +296,7 @@ def draw_screen(screen, hovered=None, clicked=None, draw_mumlogo=True, mumlogo_y
                     if _killer_ref and "scorpion" in _killer_ref.type: _killer_ref.retreat_to(_killer_ref.prev_x, _killer_ref.prev_y); _death_step = 2
                     else:
                         if _killer_ref and "mummy" in _killer_ref.type: _player.state = (PlayerState.DIE_RED_MUMMY if _killer_ref.type == "red_mummy" else PlayerState.DIE_WHITE_MUMMY); 
-                        if _killer_ref in _maze_loader.enemies_list: _maze_loader.enemies_list.remove(_killer_ref)
+                        _maze_loader.remove_enemy(_killer_ref)
                         _player.frame_index = 0; _death_step = 3
             elif _death_step == 2:
                 if _killer_ref and not _killer_ref.is_moving: _player.state = PlayerState.DIE_STUNG; sfx_manager.play("poison"); _player.frame_index = 0; _death_step = 3; _death_step_timer = now
@@ -326,7 +316,7 @@ def draw_screen(screen, hovered=None, clicked=None, draw_mumlogo=True, mumlogo_y
         elif ms == 10: _torch_animation.draw(screen, 295, 40); _torch_animation.draw(screen, 475, 40)
     if _maze_loader:
         m = pygame.mouse.get_pos() if _turn_state == TurnState.PLAYER_INPUT else None
-        _maze_loader.draw(screen, _player, None, m)
+        _maze_loader.draw(screen, _player, m)
     screen.blit(snake, (8, 80))
     if draw_mumlogo: screen.blit(mumlogo, (14, mumlogo_y if mumlogo_y else 14))
     if _world_map and _maze_loader: current_lvl = int(_maze_loader.level_id) if _maze_loader.level_id else 15; _world_map.draw(screen, current_lvl)
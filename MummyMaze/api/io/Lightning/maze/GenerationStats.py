@@ -0,0 +1,82 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from api.io.Lightning.solver.LevelValidator import CHEAP_TIERS
+
+# Why an attempt in MazeGenerator.generate_level was thrown away: placement,
+# one of the validator's cheap tiers, or the full solver
+FAILURE_REASONS = ('placement_failed',) + CHEAP_TIERS + ('unsolvable', 'budget_exhausted', 'solver_error')
+
+
+class GenerationStats:
+    """
+    Counters for one generate_level run: attempts, time spent in each phase,
+    why rejected attempts failed, and what the solvability searches cost
+    (summed over every search of the run).
+    """
+    def __init__(self, difficulty, size):
+        self.difficulty = difficulty
+        self.size = size
+        self.attempts = 0
+        self.fallback = False
+        self.phase_times = {}
+        self.failures = dict.fromkeys(FAILURE_REASONS, 0)
+        self.rejections = []  # failure reason of each rejected attempt, in order
+        self.searches = []
+        self.solutions = None  # SolutionCount of the accepted level, when the generator analyzes it
+        self.started = time.time()
+        self.seconds = 0.0
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try: yield
+        finally: self.phase_times[name] = self.phase_times.get(name, 0.0) + time.perf_counter() - start
+
+    def fail(self, reason):
+        self.failures[reason] += 1
+        self.rejections.append(reason)
+
+    def add_search(self, result):
+        self.searches.append(result)
+
+    def finish(self, fallback=False):
+        self.fallback = fallback
+        self.seconds = time.time() - self.started
+        return self
+
+    def as_dict(self):
+        prunes = {}
+        for r in self.searches:
+            for rule, n in r.prunes.items(): prunes[rule] = prunes.get(rule, 0) + n
+        return {
+            'started_at': round(self.started, 3),
+            'difficulty': self.difficulty,
+            'size': self.size,
+            'attempts': self.attempts,
+            'fallback': self.fallback,
+            'seconds': round(self.seconds, 4),
+            'phases': {name: round(t, 4) for name, t in self.phase_times.items()},
+            'failures': dict(self.failures),
+            'rejections': list(self.rejections),
+            'expanded': sum(r.expanded for r in self.searches),
+            'peak_frontier': max((r.peak_frontier for r in self.searches), default=0),
+            'visited': max((r.visited for r in self.searches), default=0),
+            'prunes': prunes,
+            'searches': [r.as_dict() for r in self.searches],
+            'solutions': self.solutions.as_dict() if self.solutions else None,
+        }
+
+    def append_jsonl(self, path):
+        """Appends this run as one JSON line to `path` (directories are created)."""
+        try:
+            folder = os.path.dirname(path)
+            if folder: os.makedirs(folder, exist_ok=True)
+            with open(path, 'a') as f: f.write(json.dumps(self.as_dict()) + "\n")
+        except OSError as e:
+            print(f"[Error] Could not write generation stats: {e}")
+
+    def __repr__(self):
+        return (f"GenerationStats({self.difficulty}, attempts={self.attempts}, fallback={self.fallback}, "
+                f"seconds={self.seconds:.3f})")
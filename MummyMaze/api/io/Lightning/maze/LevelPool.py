@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import atexit
+import random
+import hashlib
+import threading
+from collections import deque
+from api.io.Lightning.maze.WorkerPool import WorkerPool, _batch_job
+from api.io.Lightning.solver.SolveCache import CACHE_VERSION
+from api.io.Lightning.utils.ConfigFile import PROJECT_PATH
+
+POOL_PATH = os.path.join(PROJECT_PATH, "data", "level_pool.json")
+# Ready levels kept per (size, difficulty)
+POOL_CAP = 4
+# Levels older than this are dropped instead of served (seconds, one week)
+POOL_MAX_AGE = 7 * 24 * 3600
+# Played levels remembered so the pool never serves one of them again
+RECENT_LIMIT = 64
+
+
+def level_digest(level):
+    """Content hash of a level dict, the same for equal levels whatever their key order."""
+    return hashlib.sha1(json.dumps(level, sort_keys=True).encode()).hexdigest()
+
+
+class LevelPool:
+    """
+    Pre-generated random levels per (size, difficulty), persisted under data/.
+
+    `pop` hands out a ready level at once; MazeLoader only generates on the
+    spot when the pool for its settings is empty. A daemon thread refills
+    every wanted (size, difficulty) up to POOL_CAP, one level at a time on
+    its own single worker (never on the LevelRace workers, so a race does
+    not queue behind a refill), so it runs during menus and gameplay and the
+    next level is usually ready before the current one is won. A setting
+    becomes wanted when it is picked in the config screen or popped.
+
+    Entries older than POOL_MAX_AGE or validated under other turn rules
+    (CACHE_VERSION) are evicted, and a level that was played recently or is
+    already pooled is never added again.
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path=POOL_PATH, cap=POOL_CAP, max_age=POOL_MAX_AGE, workers=None):
+        self.path = path
+        self.cap = cap
+        self.max_age = max_age
+        # WorkerPool the refills run on, a one-worker pool of its own by default (started on first use)
+        self._own_workers = None if workers else WorkerPool(1)
+        self.workers = workers or self._own_workers
+        self.levels = {}  # "size:difficulty" -> deque of {'level', 'digest', 'created'}
+        self.recent = deque(maxlen=RECENT_LIMIT)
+        self.wanted = set()
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._closed = False
+        self.load()
+
+    @staticmethod
+    def shared():
+        """Process-wide pool on the default path, saved and stopped when the game exits."""
+        with LevelPool._shared_lock:
+            if LevelPool._shared is None:
+                LevelPool._shared = LevelPool()
+                atexit.register(LevelPool._shared.close)
+            return LevelPool._shared
+
+    @staticmethod
+    def _key(size, difficulty):
+        return f"{int(size)}:{difficulty}"
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f: data = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            # Levels validated under other turn rules may no longer be solvable
+            if data.get('version') != CACHE_VERSION: return
+            self.recent.extend(data.get('recent', []))
+            for key, entries in data.get('levels', {}).items():
+                self.levels[key] = deque(entries[:self.cap])
+            self._evict_stale()
+
+    def save(self):
+        with self._lock:
+            data = {'version': CACHE_VERSION, 'recent': list(self.recent),
+                    'levels': {key: list(entries) for key, entries in self.levels.items() if entries}}
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, 'w') as f: json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[Error] Could not save level pool: {e}")
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        if self._own_workers: self._own_workers.close()
+        self.save()
+
+    def count(self, size, difficulty):
+        with self._lock:
+            return len(self.levels.get(self._key(size, difficulty), ()))
+
+    def want(self, size, difficulty):
+        """Keeps (size, difficulty) filled from now on; starts the refill thread on first use."""
+        key = self._key(size, difficulty)
+        with self._lock:
+            self.wanted.add(key)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._refill_loop, name='level-pool', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def pop(self, size, difficulty):
+        """A ready level for these settings (it counts as played), or None if there is none."""
+        key = self._key(size, difficulty)
+        with self._lock:
+            self._evict_stale()
+            entries = self.levels.get(key)
+            entry = entries.popleft() if entries else None
+            if entry: self.recent.append(entry['digest'])
+        self.want(size, difficulty)
+        if entry is None: return None
+        self.save()
+        print(f"[Info] Level taken from pool ({key}, {self.count(size, difficulty)} left)")
+        return entry['level']
+
+    def played(self, level):
+        """Remembers a level that did not come from the pool, so it is not served later."""
+        with self._lock: self.recent.append(level_digest(level))
+
+    def add(self, size, difficulty, level):
+        """Pools a level unless the setting is full or the level is a repeat; -> whether it was kept."""
+        key, digest = self._key(size, difficulty), level_digest(level)
+        with self._lock:
+            entries = self.levels.setdefault(key, deque())
+            if len(entries) >= self.cap or digest in self.recent: return False
+            if any(e['digest'] == digest for pooled in self.levels.values() for e in pooled): return False
+            entries.append({'level': level, 'digest': digest, 'created': time.time()})
+        self.save()
+        return True
+
+    def _evict_stale(self):
+        oldest = time.time() - self.max_age
+        for entries in self.levels.values():
+            while entries and entries[0]['created'] < oldest: entries.popleft()
+
+    def _next_wanted(self):
+        """A wanted "size:difficulty" below the cap, the emptiest first; None when all are full."""
+        with self._lock:
+            self._evict_stale()
+            short = [(len(self.levels.get(key, ())), key) for key in self.wanted
+                     if len(self.levels.get(key, ())) < self.cap]
+        return min(short)[1] if short else None
+
+    def _refill_loop(self):
+        rng = random.Random()
+        while not self._closed:
+            key = self._next_wanted()
+            if key is None:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            size, difficulty = key.split(':')
+            try:
+                result = self.workers.submit(_batch_job, difficulty, int(size), rng.getrandbits(32), False).result()
+            except Exception as e:
+                if self._closed: return
+                print(f"[Error] Level pool refill failed: {e}")
+                time.sleep(5.0)
+                continue
+            if result['level'] is not None: self.add(size, difficulty, result['level'])
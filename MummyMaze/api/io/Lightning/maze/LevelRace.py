@@ -0,0 +1,113 @@
+import os
+import atexit
+import random
+import threading
+import time
+from concurrent.futures import wait, FIRST_COMPLETED
+from api.io.Lightning.maze.MazeGenerator import MazeGenerator
+from api.io.Lightning.maze.WorkerPool import WorkerPool, _worker_cache
+
+# Candidates raced at once; a few cores cover the slow tail without
+# starting a process per core of a big machine
+RACE_WORKERS = min(4, os.cpu_count() or 1)
+# A race that finds nothing valid by then serves the fallback map, which
+# caps the time-to-first-frame
+RACE_DEADLINE = 3.0
+
+
+class LevelRace:
+    """
+    Generates a level by racing single-attempt candidates on a WorkerPool.
+
+    generate_level tries up to MAX_ATTEMPTS layouts one after the other, so
+    an unlucky seed keeps the "GENERATING..." frame up for all of them. Here
+    every worker runs one attempt with its own seed, a finished reject is
+    replaced at once, and the first candidate that passes validation wins.
+    Queued candidates are cancelled; ones already running finish in the
+    background (an attempt is bounded by the solver budget) and are dropped.
+    After RACE_DEADLINE the fallback map is served.
+
+    Every race's time-to-level is kept in `latencies`, `summary()` gives the
+    distribution.
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, pool=None, deadline=RACE_DEADLINE, seed=None):
+        self.pool = pool or WorkerPool(RACE_WORKERS)
+        self.deadline = deadline
+        self.rng = random.Random(seed)
+        self.latencies = []
+        self.last_race = None  # {'seconds', 'candidates', 'seed', 'fallback'} of the last race
+
+    @staticmethod
+    def shared():
+        """Process-wide racer, its pool is shut down when the game exits."""
+        with LevelRace._shared_lock:
+            if LevelRace._shared is None:
+                LevelRace._shared = LevelRace()
+                atexit.register(LevelRace._shared.close)
+            return LevelRace._shared
+
+    def warm(self):
+        """Starts the workers and has them import the generator, without waiting (call from menus)."""
+        for _ in range(self.pool.workers): self.pool.submit(_warm_job)
+
+    def close(self):
+        self.pool.close()
+
+    def generate(self, difficulty, size=None):
+        started = time.perf_counter()
+        deadline = started + self.deadline
+        running = set()
+        level = seed = None
+        candidates = 0
+        try:
+            while level is None and time.perf_counter() < deadline:
+                while len(running) < self.pool.workers:
+                    running.add(self.pool.submit(_candidate_job, difficulty, size, self.rng.getrandbits(32)))
+                    candidates += 1
+                done, running = wait(running, timeout=deadline - time.perf_counter(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.result()[0] is not None:
+                        level, seed = future.result()
+                        break
+        finally:
+            for future in running: future.cancel()
+
+        fallback = level is None
+        if fallback:
+            generator = MazeGenerator(verbose=False)
+            level = generator._generate_fallback_level(int(size or generator._get_config(difficulty)['size']), difficulty)
+        seconds = time.perf_counter() - started
+        self.latencies.append(seconds)
+        self.last_race = {'seconds': seconds, 'candidates': candidates, 'seed': seed, 'fallback': fallback}
+        print(f"[Info] Level raced in {seconds * 1000:.0f} ms over {candidates} candidates"
+              f"{' (fallback map)' if fallback else ''}")
+        return level
+
+    def summary(self):
+        """Latency distribution of the races so far (see latency_summary)."""
+        return latency_summary(self.latencies)
+
+
+def latency_summary(samples):
+    """Count, p50 / p90 / p99 and max of a list of durations in seconds."""
+    if not samples: return {'count': 0}
+    ordered = sorted(samples)
+    def pct(p): return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 4)
+    return {'count': len(ordered), 'p50': pct(0.5), 'p90': pct(0.9), 'p99': pct(0.99), 'max': round(ordered[-1], 4)}
+
+
+def _warm_job():
+    return os.getpid()
+
+
+def _candidate_job(difficulty, size, seed):
+    """(level, seed) of one generate_level attempt; (None, seed) if it was rejected or failed."""
+    try:
+        generator = MazeGenerator(cache=_worker_cache(), seed=seed, verbose=False)
+        return generator.generate_level(difficulty, size, max_attempts=1, fallback=False), seed
+    except Exception as e:
+        print(f"[Error] Race candidate failed: {e}")
+        return None, seed
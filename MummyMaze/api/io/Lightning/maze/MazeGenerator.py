@@ -1,21 +1,36 @@
 import random
-from collections import deque
-from api.io.Lightning.entities.Enemy import EnemyAI
+from api.io.Lightning.utils.DisjointSet import DisjointSet
+from api.io.Lightning.utils.MazeGraph import MazeGraph, UNREACHED
+from api.io.Lightning.utils.WallGrid import WallGrid
+from api.io.Lightning.solver.LevelModel import LevelModel
+from api.io.Lightning.solver.LevelSolver import LevelSolver, STATE_BUDGET
+from api.io.Lightning.solver.SolutionCounter import SolutionCounter
+from api.io.Lightning.solver.LevelValidator import LevelValidator, CHEAP_TIERS
+from api.io.Lightning.solver.SolveCache import SolveCache
+from api.io.Lightning.solver.VectorSolver import VectorSolver, VECTOR_STATE_BUDGET
+from api.io.Lightning.maze.GenerationStats import GenerationStats
 import api.io.Lightning.utils.ConfigFile as cf
 
-class SimGate:
-    def __init__(self, x, y, is_open):
-        self.grid_x = x
-        self.grid_y = y
-        self.open = is_open
-    def is_blocking(self):
-        return not self.open
+# The player starts on one of this share of cells farthest from the exit
+# (about what keeping the best of 20 random picks used to give)
+PLAYER_FAR_FRACTION = 0.1
+# Layouts tried by generate_level before it gives up on the fallback map
+MAX_ATTEMPTS = 10
 
 class MazeGenerator:
-    def __init__(self):
+    def __init__(self, stats_path=None, cache=None, analyze=False, seed=None, verbose=True):
         self.min_loops = 0
+        # Seeded generators own their RNG, so parallel ones never share state (or results)
+        self.rng = random.Random(seed) if seed is not None else random
+        self.cache = cache if cache is not None else SolveCache.shared()
+        self.last_solve = None  # SolveResult of the last solvability check (mode, budget, proven)
+        self.last_stats = None  # GenerationStats of the last generate_level call
+        self.stats_path = stats_path  # JSONL file each run's stats are appended to, if set
+        self.analyze = analyze  # count shortest solutions of every accepted level (last_stats.solutions)
+        self.verbose = verbose  # print a line per generated level (batch jobs keep stdout clean)
 
-    def generate_level(self, difficulty, maze_size=None):
+    def generate_level(self, difficulty, maze_size=None, max_attempts=MAX_ATTEMPTS, fallback=True):
+        """A validated level; after `max_attempts` rejected ones, the fallback map (or None without `fallback`)."""
         config = self._get_config(difficulty)
         if maze_size:
             try:
@@ -25,27 +40,42 @@ class MazeGenerator:
         
         size = config['size']
         attempts = 0
-        max_attempts = 10 
+        stats = self.last_stats = GenerationStats(difficulty, size)
         
         while attempts < max_attempts:
             attempts += 1
-            walls_layout = self._generate_layout(size)
-            self._braid_maze(walls_layout, size, config['braid_factor'])
+            stats.attempts = attempts
+            with stats.phase('_generate_layout'): walls_layout = self._generate_layout(size)
+            with stats.phase('_braid_maze'): self._braid_maze(walls_layout, size, config['braid_factor'])
             raw_walls = self._get_raw_walls(walls_layout, size)
-            pruned = self._smart_prune_walls(raw_walls, size, config['wall_density'])
+            with stats.phase('_smart_prune_walls'): pruned = self._smart_prune_walls(raw_walls, size, config['wall_density'])
             
-            level_data = self._place_entities(size, pruned, config)
+            with stats.phase('_place_entities'): level_data = self._place_entities(size, pruned, config)
             if not level_data:
+                stats.fail('placement_failed')
                 continue
             
             level_data['walls'] = self._merge_walls(level_data['walls'])
             
-            if self._is_level_solvable(level_data, size):
-                print(f"[Info] Map generated successfully (Size {size}, Diff {difficulty})")
-                return level_data
+            with stats.phase('solve'): solvable = self._is_level_solvable(level_data, size)
+            if solvable:
+                if self.verbose: print(f"[Info] Map generated successfully (Size {size}, Diff {difficulty}, solved by {self.last_solve.mode})")
+                if self.analyze:
+                    with stats.phase('analyze'): stats.solutions = self._count_solutions(level_data, size)
+                return self._finish_stats(level_data)
+            if self.last_solve is None: stats.fail('solver_error')
+            elif self.last_solve.mode in CHEAP_TIERS: stats.fail(self.last_solve.mode)
+            elif self.last_solve.proven: stats.fail('unsolvable')
+            else: stats.fail('budget_exhausted')
 
-        print(f"[Warning] Generator timed out. Using Fallback map.")
-        return self._generate_fallback_level(size, difficulty)
+        if not fallback: return self._finish_stats(None)
+        if self.verbose: print(f"[Warning] Generator timed out. Using Fallback map.")
+        return self._finish_stats(self._generate_fallback_level(size, difficulty), fallback=True)
+
+    def _finish_stats(self, level_data, fallback=False):
+        self.last_stats.finish(fallback)
+        if self.stats_path: self.last_stats.append_jsonl(self.stats_path)
+        return level_data
 
     def _get_config(self, difficulty):
         if difficulty == 'easy':
@@ -90,6 +120,10 @@ class MazeGenerator:
         walls = []
         for i in range(size):
             walls.append({'x':i, 'y':-1, 'dir':'horizontal'})
+        # The mummy is walled into its corner, otherwise it catches the
+        # player on the open board and the map cannot be won
+        walls.append({'x': size-1, 'y': 0, 'dir': 'vertical'})
+        walls.append({'x': size-1, 'y': 1, 'dir': 'horizontal'})
         
         enemies = [{'type': 'white_mummy', 'x': size-1, 'y': 0}]
         
@@ -101,98 +135,68 @@ class MazeGenerator:
 
     def _place_entities(self, size, walls, config):
         occupied = set()
+        grid = WallGrid(size, walls)
         
         # Exit placement
-        side = random.randint(0, 3)
-        if side == 0: exit_pos = {'x': random.randint(0, size - 1), 'y': -1} # Top
-        elif side == 1: exit_pos = {'x': random.randint(0, size - 1), 'y': size} # Bottom
-        elif side == 2: exit_pos = {'x': -1, 'y': random.randint(0, size - 1)} # Left
-        else: exit_pos = {'x': size, 'y': random.randint(0, size - 1)} # Right
+        side = self.rng.randint(0, 3)
+        if side == 0: exit_pos = {'x': self.rng.randint(0, size - 1), 'y': -1} # Top
+        elif side == 1: exit_pos = {'x': self.rng.randint(0, size - 1), 'y': size} # Bottom
+        elif side == 2: exit_pos = {'x': -1, 'y': self.rng.randint(0, size - 1)} # Left
+        else: exit_pos = {'x': size, 'y': self.rng.randint(0, size - 1)} # Right
 
         win_x, win_y = self._exit_to_win_cell(exit_pos, size)
         occupied.add((win_x, win_y))
+        win_dist = self._get_path_distances((win_x, win_y), grid, size)
 
-        # Player placement
-        player_pos = None
-        best_p_dist = -1
-        
-        start_candidates = []
-        for _ in range(20):
-            rx, ry = random.randint(0, size-1), random.randint(0, size-1)
-            if (rx, ry) not in occupied:
-                start_candidates.append((rx, ry))
-        
-        if not start_candidates:
-            start_candidates = [(0,0)]
+        # Player placement: one of the cells farthest from the exit
+        far = sorted((d, c) for c, d in enumerate(win_dist) if d > 0)
+        if not far: return None
+        px, py = self._cell_xy(self.rng.choice(far[-max(1, int(len(far) * PLAYER_FAR_FRACTION)):])[1], size)
+        player_pos = {'x': px, 'y': py, 'direction': 'down'}
+        occupied.add((px, py))
 
-        for (px, py) in start_candidates:
-            dist = self._get_path_distance((px, py), (win_x, win_y), walls, size)
-            if dist > best_p_dist:
-                best_p_dist = dist
-                player_pos = {'x': px, 'y': py, 'direction': 'down'}
-        
-        if not player_pos: return None
-        occupied.add((player_pos['x'], player_pos['y']))
-
-        # Enemy placement
+        # Enemy placement: any free cell at least the safe distance away, the
+        # distance only relaxed (down to 2) when no such cell is left
         enemies = []
-        count = random.randint(config['min_enemies'], config['max_enemies'])
-        
+        count = self.rng.randint(config['min_enemies'], config['max_enemies'])
         safe_dist_base = 3 if size <= 6 else 5
+        player_dist = self._get_path_distances((px, py), grid, size)
 
         for _ in range(count):
-            e_type = random.choice(config.get('enemy_pool', ['white_mummy']))
-            best_e_pos = None
-            max_tries = 30
-            current_safe_dist = safe_dist_base
-
-            while max_tries > 0:
-                ex, ey = random.randint(0, size-1), random.randint(0, size-1)
-                if (ex, ey) in occupied:
-                    max_tries -= 1
-                    continue
-                
-                dist_to_player = self._get_path_distance((ex, ey), (player_pos['x'], player_pos['y']), walls, size)
-                
-                if dist_to_player >= current_safe_dist:
-                    best_e_pos = {'type': e_type, 'x': ex, 'y': ey}
+            e_type = self.rng.choice(config.get('enemy_pool', ['white_mummy']))
+            for safe_dist in range(safe_dist_base, 1, -1):
+                spots = self._free_cells(occupied, size, lambda c: player_dist[c] >= safe_dist)
+                if spots:
+                    ex, ey = self.rng.choice(spots)
+                    enemies.append({'type': e_type, 'x': ex, 'y': ey})
+                    occupied.add((ex, ey))
                     break
-                
-                max_tries -= 1
-                if max_tries % 10 == 0 and current_safe_dist > 2:
-                    current_safe_dist -= 1
-            
-            if best_e_pos:
-                enemies.append(best_e_pos)
-                occupied.add((best_e_pos['x'], best_e_pos['y']))
 
         # Key and Gate
         key_data = None
         gate_data = None
         if config.get('use_key_gate'):
-            start = (player_pos['x'], player_pos['y'])
-            target = (win_x, win_y)
-            base_path = self._find_path_cells(start, target, walls, size)
+            # Vertical steps of any shortest player-to-exit path, at least two
+            # steps away from both ends: a and b with a above or below b,
+            # player_dist[a] + 1 + win_dist[b] == the shortest length
+            total = win_dist[py * size + px]
             candidates = []
-            if base_path and len(base_path) >= 5:
-                for i in range(2, len(base_path) - 2):
-                    ax, ay = base_path[i - 1]
-                    bx, by = base_path[i]
-                    if ax == bx and abs(ay - by) == 1:
-                        gx = ax
-                        gy = max(ay, by)
-                        if 1 <= gy <= size - 1:
-                            if not self._check_wall(ax, ay, bx, by, walls):
-                                candidates.append((gx, gy))
-            
+            if total >= 4:
+                for b in range(size, size * size):
+                    a = b - size
+                    for u, v in ((a, b), (b, a)):
+                        if player_dist[u] >= 1 and win_dist[v] >= 2 and player_dist[u] + 1 + win_dist[v] == total \
+                                and not grid.has_wall(u % size, u // size, v % size, v // size):
+                            candidates.append((b % size, b // size))
+
             if candidates:
-                random.shuffle(candidates)
-                gx, gy = candidates[0]
+                gx, gy = self.rng.choice(candidates)
                 gate_data = {'x': gx, 'y': gy}
-                reachable = self._reachable_set(start, walls, size, gate_info=(gx, gy), gate_open=False)
-                key_cands = [p for p in reachable if p not in occupied and p != start]
+                grid.set_gate((gx, gy))
+                behind = self._get_path_distances((px, py), grid, size, gate_open=False)
+                key_cands = self._free_cells(occupied, size, lambda c: behind[c] > 0)
                 if key_cands:
-                    kx, ky = random.choice(key_cands)
+                    kx, ky = self.rng.choice(key_cands)
                     key_data = {'x': kx, 'y': ky}
                     occupied.add((kx, ky))
                 else:
@@ -201,12 +205,11 @@ class MazeGenerator:
         # Traps
         traps = []
         for _ in range(config.get('traps', 0)):
-            for _ in range(10):
-                tx, ty = random.randint(0, size - 1), random.randint(0, size - 1)
-                if (tx, ty) not in occupied:
-                    traps.append({'x': tx, 'y': ty})
-                    occupied.add((tx, ty))
-                    break
+            spots = self._free_cells(occupied, size)
+            if not spots: break
+            tx, ty = self.rng.choice(spots)
+            traps.append({'x': tx, 'y': ty})
+            occupied.add((tx, ty))
 
         return {
             "difficulty": config['difficulty_str'],
@@ -222,70 +225,45 @@ class MazeGenerator:
         }
 
     # --- Pathfinding Helpers ---
-    def _is_level_solvable(self, level, size):
+    def _is_level_solvable(self, level, size, max_states=None):
+        self.last_solve = None
+        # Cheap filters first, the full search only for levels that pass them
+        validator = LevelValidator(lambda model: self._solve_model(model, max_states))
+        try: result = validator.check(level, size, level.get('difficulty', 'medium'))
+        except Exception as e:
+            print(f"[Error] Solvability check failed: {e}")
+            return None
+        self.last_solve = result
+        return True if result.solved else None
+
+    def _count_solutions(self, level, size, max_states=None):
+        """SolutionCount (number of shortest solutions, forced-move ratio) of a level, None on error."""
         try:
-            start = (int(level['player']['x']), int(level['player']['y']))
-            wx, wy = self._exit_to_win_cell(level['exit'], size)
-            target = (wx, wy)
-        except: return None
-        
-        walls = level['walls']
-        enemies = level['enemies']
-        
-        gate_info = (int(level['gate']['x']), int(level['gate']['y'])) if level['gate'] else None
-        key_pos = (int(level['key']['x']), int(level['key']['y'])) if level['key'] else None
-        
-        traps = set()
-        for t in level['traps']:
-            traps.add((int(t['x']), int(t['y'])))
-            
-        if start in traps or target in traps: return None
-        
-        ai = EnemyAI(size, walls, gate=None)
-        start_state = (start[0], start[1], (gate_info is None), tuple((e['x'], e['y']) for e in enemies))
-        q = deque([start_state])
-        visited = {start_state}
-        
-        steps = 0
-        while q:
-            steps += 1
-            if steps > 2500: return None 
-            
-            curr = q.popleft()
-            px, py, g_open, e_pos = curr
-            if (px, py) == target: return True
-            
-            for dx, dy in [(0,0), (0,1), (0,-1), (1,0), (-1,0)]:
-                nx, ny = px+dx, py+dy
-                
-                if not (0<=nx<size and 0<=ny<size): continue
-                if (nx, ny) in traps: continue
-                if self._check_wall(px, py, nx, ny, walls): continue
-                if gate_info and not g_open and self._gate_blocks(px, py, nx, ny, gate_info, False): continue
-                if (nx, ny) in e_pos: continue
-                
-                n_g_open = g_open
-                if not g_open and key_pos and (nx, ny) == key_pos: n_g_open = True
-                
-                ai.gate = SimGate(gate_info[0], gate_info[1], n_g_open) if gate_info else None
-                next_e_pos = []
-                dead = False
-                
-                for i, ep in enumerate(e_pos):
-                    sim_enemy = {'type': enemies[i]['type'], 'pos': [ep[0], ep[1]]}
-                    path = ai.get_move_path(sim_enemy, [nx, ny], difficulty='medium')
-                    
-                    final_ep = path[-1] if path else list(ep)
-                    if final_ep[0] == nx and final_ep[1] == ny: dead = True
-                    next_e_pos.append(tuple(final_ep))
-                
-                if dead: continue
-                
-                next_state = (nx, ny, n_g_open, tuple(next_e_pos))
-                if next_state not in visited:
-                    visited.add(next_state)
-                    q.append(next_state)
-        return None
+            model = LevelModel(level, size, level.get('difficulty', 'medium'))
+            return SolutionCounter(model).run(max_states or STATE_BUDGET)
+        except Exception as e:
+            print(f"[Error] Solution count failed: {e}")
+            return None
+
+    def _solve_model(self, model, max_states=None):
+        cached = self.cache.lookup(model)
+        if cached:
+            if self.last_stats: self.last_stats.add_search(cached)
+            return cached
+        # Whole-layer BFS on big boards when numpy is there, serial A* otherwise
+        if VectorSolver.preferred(model): result = VectorSolver(model).bfs(max_states or VECTOR_STATE_BUDGET)
+        else: result = LevelSolver(model).solve(max_states or STATE_BUDGET)
+        # Out of budget proves nothing: IDA* tries again for an optimal answer in
+        # bounded memory, then a beam search may still find some solution
+        if not result.proven:
+            if self.last_stats: self.last_stats.add_search(result)
+            result = LevelSolver(model).ida()
+        if not result.proven:
+            if self.last_stats: self.last_stats.add_search(result)
+            result = LevelSolver(model).beam()
+        self.cache.store(model, result)
+        if self.last_stats: self.last_stats.add_search(result)
+        return result
 
     def _generate_layout(self, size):
         grid = [[set() for _ in range(size)] for _ in range(size)]
@@ -299,7 +277,7 @@ class MazeGenerator:
                 if 0 <= nx < size and 0 <= ny < size and (nx, ny) not in visited:
                     neighbors.append((nx, ny, d, opp))
             if neighbors:
-                nx, ny, d, opp = random.choice(neighbors)
+                nx, ny, d, opp = self.rng.choice(neighbors)
                 grid[cx][cy].add(d); grid[nx][ny].add(opp)
                 visited.add((nx, ny)); stack.append((nx, ny))
             else: stack.pop()
@@ -307,7 +285,7 @@ class MazeGenerator:
 
     def _braid_maze(self, grid, size, factor):
         dead_ends = [(x, y) for x in range(size) for y in range(size) if len(grid[x][y]) == 1]
-        random.shuffle(dead_ends)
+        self.rng.shuffle(dead_ends)
         for i in range(int(len(dead_ends) * factor)):
             cx, cy = dead_ends[i]
             neighbors = []
@@ -316,7 +294,7 @@ class MazeGenerator:
                 if 0 <= nx < size and 0 <= ny < size and d not in grid[cx][cy]:
                     neighbors.append((nx, ny, d, opp))
             if neighbors:
-                nx, ny, d, opp = random.choice(neighbors)
+                nx, ny, d, opp = self.rng.choice(neighbors)
                 grid[cx][cy].add(d); grid[nx][ny].add(opp)
 
     def _get_raw_walls(self, grid, size):
@@ -328,32 +306,36 @@ class MazeGenerator:
         return walls
 
     def _smart_prune_walls(self, walls, size, density):
+        """
+        Takes random walls out until `density` walls per cell are left, keeping
+        only removals after which every cell is still reachable. Removing a
+        wall can only join cells, so connectivity is kept in a union-find and
+        each candidate is checked with two finds instead of a BFS.
+        """
         target = int((size * size) * density)
         if len(walls) <= target: return walls
         walls_copy = walls.copy()
-        random.shuffle(walls_copy)
-        removed = 0
+        self.rng.shuffle(walls_copy)
+        removed = set()
         to_remove = len(walls) - target
+        cells = DisjointSet.of_grid(WallGrid.of(walls, size))
         for w in walls_copy:
-            if removed >= to_remove: break
-            test = [x for x in walls if x != w]
-            if self._is_maze_connected(test, size):
-                walls.remove(w)
-                removed += 1
+            if len(removed) >= to_remove: break
+            a, b = self._wall_cells(w, size)
+            joins = b is not None and not cells.connected(a, b)
+            if cells.components - joins == 1:
+                if joins: cells.union(a, b)
+                removed.add(id(w))
+        walls[:] = [w for w in walls if id(w) not in removed]
         return walls
 
-    def _is_maze_connected(self, walls, size):
-        visited = {(0,0)}
-        q = deque([(0,0)])
-        while q:
-            cx, cy = q.popleft()
-            for dx, dy in [(0,1), (0,-1), (1,0), (-1,0)]:
-                nx, ny = cx+dx, cy+dy
-                if 0<=nx<size and 0<=ny<size and (nx,ny) not in visited:
-                    if not self._check_wall(cx, cy, nx, ny, walls):
-                        visited.add((nx,ny))
-                        q.append((nx,ny))
-        return len(visited) == size * size
+    @staticmethod
+    def _wall_cells(wall, size):
+        """The two cells a wall separates, (cell, None) for a wall on the map border."""
+        x, y = int(wall['x']), int(wall['y'])
+        cell = y * size + x
+        if wall['dir'] == 'horizontal': return cell, (cell - size if y > 0 else None)
+        return cell, (cell - 1 if x > 0 else None)
 
     def _merge_walls(self, walls):
         merged = {}
@@ -368,69 +350,17 @@ class MazeGenerator:
         ex, ey = int(exit_pos['x']), int(exit_pos['y'])
         return max(0, min(size - 1, ex)), max(0, min(size - 1, ey))
 
-    def _reachable_set(self, start, walls, size, gate_info=None, gate_open=True):
-        visited = {start}
-        q = deque([start])
-        while q:
-            cx, cy = q.popleft()
-            for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                nx, ny = cx + dx, cy + dy
-                if 0 <= nx < size and 0 <= ny < size:
-                    if (nx, ny) not in visited:
-                        if not self._check_wall(cx, cy, nx, ny, walls) and \
-                           not self._gate_blocks(cx, cy, nx, ny, gate_info, gate_open):
-                            visited.add((nx, ny))
-                            q.append((nx, ny))
-        return visited
-
-    def _find_path_cells(self, start, end, walls, size):
-        q = deque([start])
-        parent = {start: None}
-        while q:
-            curr = q.popleft()
-            if curr == end:
-                path = []
-                while curr:
-                    path.append(curr)
-                    curr = parent[curr]
-                return path[::-1]
-            cx, cy = curr
-            for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                nx, ny = cx + dx, cy + dy
-                if 0 <= nx < size and 0 <= ny < size and (nx, ny) not in parent:
-                    if not self._check_wall(cx, cy, nx, ny, walls):
-                        parent[(nx, ny)] = curr
-                        q.append((nx, ny))
-        return None
-
-    def _check_wall(self, x1, y1, x2, y2, walls):
-        if x2 > x1: check = (x2, y2, 'vertical')
-        elif x2 < x1: check = (x1, y1, 'vertical')
-        elif y2 > y1: check = (x2, y2, 'horizontal')
-        elif y2 < y1: check = (x1, y1, 'horizontal')
-        else: return False
-        
-        for w in walls:
-            if w['x'] == check[0] and w['y'] == check[1] and w['dir'] in [check[2], 'both']:
-                return True
-        return False
+    @staticmethod
+    def _cell_xy(cell, size):
+        return cell % size, cell // size
 
-    def _get_path_distance(self, start, end, walls, size):
-        q = deque([(start[0], start[1], 0)])
-        visited = {start}
-        while q:
-            cx, cy, d = q.popleft()
-            if (cx, cy) == end: return d
-            for dx, dy in [(0,1), (0,-1), (1,0), (-1,0)]:
-                nx, ny = cx+dx, cy+dy
-                if 0<=nx<size and 0<=ny<size and (nx,ny) not in visited:
-                    if not self._check_wall(cx, cy, nx, ny, walls):
-                        visited.add((nx,ny))
-                        q.append((nx, ny, d+1))
-        return -1
+    @staticmethod
+    def _free_cells(occupied, size, keep=None):
+        """(x, y) of every unoccupied cell, in row-major order, that passes `keep(cell index)`."""
+        return [(c % size, c // size) for c in range(size * size)
+                if (c % size, c // size) not in occupied and (keep is None or keep(c))]
 
-    def _gate_blocks(self, fx, fy, tx, ty, gate_info, gate_open):
-        if not gate_info or gate_open: return False
-        gx, gy = gate_info
-        return ((fx == gx and fy == gy - 1 and tx == gx and ty == gy) or
-                (fx == gx and fy == gy and tx == gx and ty == gy - 1))
\ No newline at end of file
+    def _get_path_distances(self, start, walls, size, gate_open=True):
+        """Path distance from `start` to every cell (index y * size + x), -1 where walls cut it off."""
+        graph = MazeGraph.for_grid(WallGrid.of(walls, size), gate_open)
+        return [-1 if d == UNREACHED else d for d in graph.distances_from(start[1] * size + start[0])]
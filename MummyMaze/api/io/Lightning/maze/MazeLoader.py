@@ -3,16 +3,27 @@ import json
 import pygame
 import random
 import math
+import threading
 from collections import deque
 
 from api.io.Lightning.manager.SoundReader import sfx_manager
 from api.io.Lightning.manager.Spritesheet import Spritesheet
 from api.io.Lightning.maze.MazeGenerator import MazeGenerator
+from api.io.Lightning.maze.LevelRace import LevelRace
+from api.io.Lightning.maze.LevelPool import LevelPool
+from api.io.Lightning.maze.OccupancyGrid import OccupancyGrid
+from api.io.Lightning.solver.LevelSolver import LevelSolver
+from api.io.Lightning.solver.SolvabilityWorker import SolvabilityWorker, Solvability
+from api.io.Lightning.solver.SolveCache import SolveCache
+from api.io.Lightning.solver.LevelModel import LevelModel, ACTIONS, ENEMY_MOVE, KEY_TOGGLE, FIGHT, CAUGHT, TRAPPED, WON
+from api.io.Lightning.solver.Tablebase import Tablebase, LOST
+from api.io.Lightning.solver.TablebasePack import PackedTablebase
 from api.io.Lightning.utils.ConfigFile import LEVELS_PATH, UI_PATH, OBJECTS_PATH, maze_coord_x, maze_coord_y
 from api.io.Lightning.objects.Key import Key
 from api.io.Lightning.objects.Gate import Gate
 from api.io.Lightning.objects.Trap import Trap
 from api.io.Lightning.entities.Enemy import Enemy
+from api.io.Lightning.utils.WallGrid import WallGrid
 
 class FightEffect:
     def __init__(self, x, y, dust_frames, star_img, cell_size):
@@ -76,8 +87,15 @@ class MazeLoader:
         
         elif generate_infinite:
             print(f"[System] Generating procedural level (Size: {self.target_size})...")
-            gen = MazeGenerator()
-            self.data = gen.generate_level(difficulty, maze_size=self.target_size)
+            pool = LevelPool.shared()
+            self.data = pool.pop(self.target_size, difficulty)
+            if self.data is None:
+                try:
+                    self.data = LevelRace.shared().generate(difficulty, self.target_size)
+                except Exception as e:
+                    print(f"[Error] Level race failed ({e}), generating in place")
+                    self.data = MazeGenerator().generate_level(difficulty, maze_size=self.target_size)
+                pool.played(self.data)
             self.parsed = self._parse_level_data(self.data)
         else:
             self.data = self._load_level()
@@ -91,6 +109,9 @@ class MazeLoader:
         self.maze_size = self.parsed.get("maze_size", self.target_size)
         self.stair_pos = self.parsed.get("exit")
         self.cell_size = self.maze_pixel_size // self.maze_size
+        self.wall_grid = WallGrid(self.maze_size, self.parsed['walls'], self.parsed.get('gate'))
+        # Turn rules shared with the solver; the UI only animates what they report
+        self.rules = LevelModel(self.parsed, self.maze_size, self.parsed.get('difficulty') or 'medium', prune=False)
         
         self.wall_sprites = {}
         self.stair_sprites = {}
@@ -101,19 +122,26 @@ class MazeLoader:
         self.traps = []
         self.key_obj = None
         self.gate_obj = None
+        self.occupancy = OccupancyGrid(self.maze_size)
         
-        self.enemies_on_key = set()
         self.last_turn_time = 0
         self.history_stack = []
         self.pending_deaths = []
-        self.turn_queue = deque()
+        self.turn_events = deque()
+        self.turn_slots = []
+        self.turn_killer = None
         self.ankh_frames = []
         self.is_current_state_solvable = True
-        self.generator_instance = MazeGenerator()
+        self.solvability = Solvability.SOLVABLE
+        self.solvability_worker = SolvabilityWorker()
+        self.tablebase = None
+        self.tablebase_thread = None
+        self._tablebase_cancel = threading.Event()
         self.ankh_timer = 0
         
         self._load_assets()
         self._create_objects()
+        self._start_tablebase()
         
         # Restore Gate Open state if loading
         if saved_state and self.gate_obj and saved_state.get('gate_open'):
@@ -188,8 +216,10 @@ class MazeLoader:
         self._create_objects()
         self.active_effects = []
         self.pending_deaths = []
-        self.turn_queue.clear()
+        self.turn_events.clear()
         self.is_current_state_solvable = True
+        self.solvability = Solvability.SOLVABLE
+        self.solvability_worker.set_state(Solvability.SOLVABLE)
         self.history_stack.clear()
 
     def save_state(self, player):
@@ -197,6 +227,7 @@ class MazeLoader:
             'player': {'x': player.x, 'y': player.y, 'dir': player.direction},
             'gate_open': not self.gate_obj.is_blocking() if self.gate_obj else True,
             'solvable': self.is_current_state_solvable,
+            'solvability': self.solvability,
             'enemies': [{'type': e.type, 'x': e.x, 'y': e.y, 'dir': e.direction} for e in self.enemies_list if not e.is_dead],
             'traps': [t.is_triggered for t in self.traps]
         }
@@ -218,21 +249,25 @@ class MazeLoader:
             self.gate_obj.state = self.gate_obj.STATE_OPEN if state['gate_open'] else self.gate_obj.STATE_CLOSED
         
         self.is_current_state_solvable = state['solvable']
+        self.solvability = state['solvability']
+        self.solvability_worker.set_state(self.solvability)
         self.enemies_list.clear()
-        self.enemies_on_key.clear()
         
         for e in state['enemies']:
-            en = Enemy(e['x'], e['y'], e['type'], self.maze_size, self.cell_size, self.parsed['walls'], self.gate_obj)
+            en = Enemy(e['x'], e['y'], e['type'], self.maze_size, self.cell_size)
             en.direction = e['dir']
             self.enemies_list.append(en)
+        self.occupancy.rebuild(self.enemies_list, self.traps, self.key_obj)
             
         for i, triggered in enumerate(state.get('traps', [])):
             if i < len(self.traps) and self.traps[i].is_triggered and not triggered:
                 self.traps[i].reset()
         
-        self.turn_queue.clear()
+        self.turn_events.clear()
         self.pending_deaths.clear()
         self.active_effects.clear()
+        # The check was cut short when this position was left, try it again
+        if self.solvability == Solvability.UNKNOWN: self.check_solvability(player)
         return True
 
     def _create_objects(self):
@@ -241,7 +276,8 @@ class MazeLoader:
         if self.parsed['gate']:
             self.gate_obj = Gate(self.parsed['gate']['x'], self.parsed['gate']['y'], self.cell_size, self.maze_size)
         self.traps = [Trap(t['x'], t['y'], self.cell_size, self.maze_size) for t in self.parsed['traps']]
-        self.enemies_list = [Enemy(e['x'], e['y'], e['type'], self.maze_size, self.cell_size, self.parsed['walls'], self.gate_obj) for e in self.parsed['enemies']]
+        self.enemies_list = [Enemy(e['x'], e['y'], e['type'], self.maze_size, self.cell_size) for e in self.parsed['enemies']]
+        self.occupancy.rebuild(self.enemies_list, self.traps, self.key_obj)
 
     def _load_assets(self):
         self.backdrop_img = pygame.image.load(os.path.join(UI_PATH, 'backdrop.jpg'))
@@ -286,9 +322,8 @@ class MazeLoader:
         for i in range(ds.get_width() // h):
             self.dust_frames.append(ds.subsurface((i*h, 0, h, h)))
 
-    def get_solution_path(self, player):
-        if not player: return None
-        snap = {
+    def _snapshot(self, player):
+        return {
             'player': {'x': player.x, 'y': player.y},
             'exit': self.parsed['exit'],
             'enemies': [{'type':e.type, 'x':e.x, 'y':e.y} for e in self.enemies_list if not e.is_dead],
@@ -296,15 +331,99 @@ class MazeLoader:
             'traps': self.parsed['traps'],
             'gate': {'x': self.gate_obj.grid_x, 'y': self.gate_obj.grid_y} if self.gate_obj else None,
             'key': {'x': self.key_obj.grid_x, 'y': self.key_obj.grid_y} if self.key_obj else None,
+            'gate_open': not self.gate_obj.is_blocking() if self.gate_obj else True,
             'difficulty': self.parsed['difficulty']
         }
-        return self.generator_instance._is_level_solvable(snap, self.maze_size)
+
+    def solve_current_state(self, player):
+        """Optimal solution from the current position (SolveResult), or None without a player."""
+        if not player: return None
+        solver = LevelSolver.for_level(self._snapshot(player), self.maze_size)
+        cache = SolveCache.shared()
+        cached = cache.lookup(solver.model)
+        if cached and (cached.moves is not None or not cached.solved): return cached
+        result = solver.solve()
+        cache.store(solver.model, result)
+        return result
+
+    def _campaign_level_path(self):
+        level_path = os.path.join(LEVELS_PATH, f'level_{self.level_id}.json') if self.level_id else None
+        return level_path if level_path and os.path.exists(level_path) else None
+
+    def _start_tablebase(self):
+        """Maps an up-to-date pack right away; only levels without one get a (cancellable) build thread."""
+        level_path = self._campaign_level_path()
+        if level_path: self.tablebase = PackedTablebase.open_pack(level_path)
+        if self.tablebase: return
+        self.tablebase_thread = threading.Thread(target=self._build_tablebase, args=(self._tablebase_cancel,), daemon=True)
+        self.tablebase_thread.start()
+
+    def cancel_tablebase(self):
+        """Stops a build still running for this level (called when the loader is replaced)."""
+        self._tablebase_cancel.set()
+
+    def _build_tablebase(self, cancel):
+        # Exact distance table for the whole level, so later checks are lookups
+        try:
+            level_path = self._campaign_level_path()
+            if level_path:
+                # Campaign levels use the prebuilt pack next to the json
+                tb = PackedTablebase.load_or_build(level_path, cancel=cancel)
+            else:
+                model = LevelModel(self.parsed, self.maze_size, self.parsed.get('difficulty') or 'medium')
+                tb = Tablebase.build(model, cancel=cancel)
+            if not cancel.is_set(): self.tablebase = tb
+        except Exception as e:
+            print(f"[Error] Tablebase build failed: {e}")
+
+    def _lookup_tablebase(self, snap):
+        """Distance-to-win of a snapshot from the tablebase, None if it is not covered."""
+        tb = self.tablebase
+        if not tb: return None
+        key = tb.key_for(snap)
+        return None if key is None else tb.distance(key)
+
+    def get_hint(self, player):
+        """Next (dx, dy) on a shortest solution, None if there is none."""
+        if not player: return None
+        snap = self._snapshot(player)
+        tb = self.tablebase
+        if tb and self._lookup_tablebase(snap) is not None:
+            return tb.best_move(tb.key_for(snap))
+        path = self.get_solution_path(player)
+        return path[0] if path else None
+
+    def get_solution_path(self, player):
+        """Shortest list of (dx, dy) moves to the exit ((0, 0) = wait), None if none was found."""
+        result = self.solve_current_state(player)
+        return result.moves if result and result.solved else None
 
     def check_solvability(self, player):
+        """Starts a background check of the current position; see update_solvability."""
         if not player: return
+        snap = self._snapshot(player)
+        dist = self._lookup_tablebase(snap)
+        if dist is not None:
+            self.solvability_worker.cancel()
+            self._apply_verdict(Solvability.UNSOLVABLE if dist == LOST else Solvability.SOLVABLE)
+            return
+        self.solvability_worker.submit(snap, self.maze_size)
+        self.solvability = Solvability.THINKING
+
+    def cancel_solvability_check(self):
+        self.solvability_worker.cancel()
+        self.solvability = self.solvability_worker.poll()
+
+    def update_solvability(self):
+        if self.solvability != Solvability.THINKING: return
+        state = self.solvability_worker.poll()
+        if state == Solvability.THINKING: return
+        self._apply_verdict(state)
+
+    def _apply_verdict(self, state):
+        self.solvability = state
         was_solvable = self.is_current_state_solvable
-        path = self.get_solution_path(player)
-        self.is_current_state_solvable = (path is not None)
+        self.is_current_state_solvable = (state != Solvability.UNSOLVABLE)
         if was_solvable and not self.is_current_state_solvable:
             sfx_manager.play('badankh')
 
@@ -312,8 +431,12 @@ class MazeLoader:
         if not self.ankh_frames: return
         base = 0 if self.is_current_state_solvable else 2
         surface.blit(self.ankh_frames[base], (90, 320))
-        self.ankh_timer += 0.08
-        alpha = int(((math.sin(self.ankh_timer) + 1) / 2) * 255)
+        # Faster, dimmer pulse while the check is still running, a steady
+        # faint glow when it gave up without an answer
+        thinking = (self.solvability == Solvability.THINKING)
+        self.ankh_timer += 0.25 if thinking else 0.08
+        if self.solvability == Solvability.UNKNOWN: alpha = 64
+        else: alpha = int(((math.sin(self.ankh_timer) + 1) / 2) * (128 if thinking else 255))
         glow = self.ankh_frames[base+1].copy()
         glow.set_alpha(alpha)
         surface.blit(glow, (90, 320))
@@ -321,33 +444,74 @@ class MazeLoader:
     def spawn_fight_cloud(self, x, y):
         self.active_effects.append(FightEffect(x, y, self.dust_frames, self.star_img, self.cell_size))
 
+    def play_turn(self, player, dx, dy):
+        """
+        Resolves a player move with the shared turn rules and queues the
+        turn's events (see LevelModel.step) for playback. Returns the events,
+        None if the move is not allowed.
+        """
+        enemies = [e for e in self.enemies_list if not e.is_dead]
+        snap = self._snapshot(player)
+        order = self.rules.slot_order(snap['enemies'])
+        if order is None: return None
+        _, events = self.rules.step(self.rules.key_for(snap), ACTIONS.index((dx, dy)))
+        if not events: return None
+        self.turn_slots = [enemies[i] if i >= 0 else None for i in order]
+        self.turn_events = deque(events)
+        self.turn_killer = None
+        return events
+
+    def play_player_events(self):
+        """Plays the player's half of the turn; -> TRAPPED or WON if it ends the game, else None."""
+        while self.turn_events and self.turn_events[0][0] != ENEMY_MOVE:
+            event = self.turn_events.popleft()
+            if event[0] == KEY_TOGGLE: self._set_gate(event[2])
+            elif event[0] in (TRAPPED, WON): return event[0]
+        return None
+
     def init_enemy_turn_sequence(self):
-        active = [e for e in self.enemies_list if not e.is_dead]
-        order = {'scorpion': 0, 'red_scorpion': 1, 'white_mummy': 2, 'red_mummy': 3}
-        active.sort(key=lambda e: order.get(e.type, 99))
-        self.turn_queue = deque(active)
         self.last_turn_time = 0
 
-    def update_turn_sequence(self, player_pos):
-        if any(e.paused for e in self.enemies_list): return False
-        if any(e.is_moving or len(e.move_queue)>0 for e in self.enemies_list):
-            self.last_turn_time = pygame.time.get_ticks()
-            return False
-        if self.pending_deaths: return False
-        if pygame.time.get_ticks() - self.last_turn_time < 50: return False
-        
-        if not self.turn_queue: return True
-        
-        nxt = self.turn_queue[0]
-        if nxt.is_dead or nxt not in self.enemies_list:
-            self.turn_queue.popleft()
-            return self.update_turn_sequence(player_pos)
-            
-        self.turn_queue.popleft()
-        nxt.move_logic([player_pos[0], player_pos[1]], self.parsed['difficulty'])
-        
-        if not nxt.move_queue: return self.update_turn_sequence(player_pos)
-        return False
+    def update_turn_sequence(self):
+        """
+        Plays the enemies' half of the turn one step at a time. Key toggles,
+        fights and captures fire once the step leading to them has started.
+        -> FIGHT when a fight needs its pause, CAUGHT when the player is
+        caught (by `turn_killer`), True once the turn is over, else None.
+        """
+        if any(e.paused for e in self.enemies_list): return None
+        if any(e.move_queue for e in self.enemies_list): return None
+        if self.pending_deaths: return None
+        moving = any(e.is_moving for e in self.enemies_list)
+        if moving: self.last_turn_time = pygame.time.get_ticks()
+        while self.turn_events:
+            event = self.turn_events[0]
+            if event[0] == ENEMY_MOVE:
+                if moving or pygame.time.get_ticks() - self.last_turn_time < 50: return None
+                # A mummy's two steps play back to back unless something happens in between
+                enemy = self.turn_slots[event[1]]
+                while self.turn_events and self.turn_events[0][0] == ENEMY_MOVE and self.turn_events[0][1] == event[1]:
+                    enemy.move_queue.append(list(self.rules.codec.xy(self.turn_events.popleft()[3])))
+                return None
+            self.turn_events.popleft()
+            if event[0] == KEY_TOGGLE:
+                self._set_gate(event[2])
+            elif event[0] == FIGHT:
+                x, y = self.rules.codec.xy(event[3])
+                sfx_manager.play('pummel')
+                self.spawn_fight_cloud(x, y)
+                self.pending_deaths.append(self.turn_slots[event[2]])
+                return FIGHT
+            elif event[0] == CAUGHT:
+                self.turn_killer = self.turn_slots[event[1]]
+                return CAUGHT
+        return None if moving else True
+
+    def _set_gate(self, gate_open):
+        if not self.gate_obj: return
+        self.gate_obj.set_open(gate_open)
+        if self.key_obj: self.key_obj.activate()
+        sfx_manager.play('gate')
 
     def trigger_enemy_afk(self):
         for e in self.enemies_list: e.trigger_afk()
@@ -357,58 +521,34 @@ class MazeLoader:
     def resume_enemies(self):
         for e in self.enemies_list: e.paused = False
 
-    def resolve_enemy_collisions(self):
-        pos_map = {}
-        for e in self.enemies_list:
-            if e.state.name == "DIE": continue
-            p = (e.x, e.y)
-            if p not in pos_map: pos_map[p] = []
-            pos_map[p].append(e)
-        
-        col = False
-        for p, ens in pos_map.items():
-            if len(ens) > 1:
-                sfx_manager.play('pummel')
-                self.spawn_fight_cloud(p[0], p[1])
-                ens.sort(key=lambda x: x.strength, reverse=True)
-                self.pending_deaths.extend(ens[1:])
-                col = True
-        return col
+    def remove_enemy(self, enemy):
+        if enemy in self.enemies_list: self.enemies_list.remove(enemy)
+        self.occupancy.remove(enemy)
 
     def process_pending_deaths(self):
         for v in self.pending_deaths: v.trigger_die(instant=True)
         self.pending_deaths.clear()
 
     def update(self):
+        self.update_solvability()
         if self.key_obj: self.key_obj.update()
         if self.gate_obj: self.gate_obj.update()
         for t in self.traps: t.update()
-        for e in self.enemies_list: e.update()
+        for e in self.enemies_list:
+            e.update()
+            if e.is_dead: self.occupancy.remove(e)
         self.enemies_list = [e for e in self.enemies_list if not e.is_dead]
         for eff in self.active_effects: eff.update()
         self.active_effects = [e for e in self.active_effects if not e.finished]
-        
-        if self.key_obj and self.gate_obj:
-            kx, ky = self.key_obj.grid_x, self.key_obj.grid_y
-            for e in self.enemies_list:
-                if e.x == kx and e.y == ky:
-                    if e not in self.enemies_on_key:
-                        self.gate_obj.toggle()
-                        self.key_obj.activate()
-                        sfx_manager.play('gate')
-                        self.enemies_on_key.add(e)
-                else:
-                    if e in self.enemies_on_key: self.enemies_on_key.remove(e)
 
     def draw_background(self, surface):
         surface.blit(self.backdrop_img, (0,0))
         surface.blit(self.floor_img, (maze_coord_x, maze_coord_y))
 
-    def draw(self, surface, player=None, enemies=None, mouse_pos=None):
+    def draw(self, surface, player=None, mouse_pos=None):
         self.draw_stairs(surface)
         for t in self.traps: t.draw(surface)
         
-        current_enemies = enemies if enemies else self.enemies_list
         for row in range(self.maze_size + 1):
             if self.gate_obj and self.gate_obj.grid_y == row: self.gate_obj.draw(surface)
             self._draw_walls(surface, row)
@@ -423,41 +563,33 @@ class MazeLoader:
                     if (gx, gy) == (player.x, player.y) and self.circle_img:
                         surface.blit(self.circle_img, (maze_coord_x + gx*self.cell_size, maze_coord_y + gy*self.cell_size))
                     elif abs(dx)+abs(dy)==1 and self.arrow_sprites:
-                        blocked = False
-                        for e in current_enemies:
-                            if e.x == gx and e.y == gy: blocked = True
-                        if not blocked and player.check_eligible_move(gx, gy, self.maze_size, self.parsed['walls'], self.gate_obj):
+                        blocked = self.occupancy.enemy_at(gx, gy) is not None
+                        if not blocked and player.check_eligible_move(gx, gy, self.maze_size, self.wall_grid, self.gate_obj):
                             idx = 2 if dx==1 else 1 if dx==-1 else 0 if dy==1 else 3 
                             surface.blit(self.arrow_sprites[idx], (maze_coord_x + gx*self.cell_size, maze_coord_y + gy*self.cell_size))
 
-            entities = []
-            if player and player.y == row: entities.append(player)
-            for e in current_enemies: 
-                if e.y == row: entities.append(e)
-            for t in self.traps:
-                if t.grid_y == row and t.is_triggered: entities.append(t)
-            
-            entities.sort(key=lambda x: 1 if isinstance(x, Trap) else 0)
-            
-            for ent in entities:
-                if isinstance(ent, Trap): ent.draw_active_block(surface)
-                else: ent.draw(surface)
+            # Player and enemies first, triggered trap blocks on top of them
+            if player and player.y == row: player.draw(surface)
+            for e in self.occupancy.row_enemies(row): e.draw(surface)
+            for t in self.occupancy.row_traps(row):
+                if t.is_triggered: t.draw_active_block(surface)
             
             for eff in self.active_effects:
                 if eff.y == row: eff.draw(surface)
 
     def _draw_walls(self, surface, row):
-        for w in self.parsed['walls']:
-            if w['y'] != row: continue
-            wx, d = w['x'], w['dir']
+        if row >= self.maze_size: return
+        for wx in range(self.maze_size):
+            top, left = self.wall_grid.wall_top(wx, row), self.wall_grid.wall_left(wx, row)
+            if not (top or left): continue
             bx = maze_coord_x + wx*self.cell_size
             by = maze_coord_y + row*self.cell_size
             ox, oy = int(self.cell_size*0.08), int(self.cell_size*0.27)
             dx, dy = bx - ox, by - oy
             
-            if d in ['horizontal', 'both'] and row > 0:
+            if top:
                 surface.blit(self.wall_sprites['h'], (dx, dy))
-            if d in ['vertical', 'both'] and wx > 0:
+            if left:
                 surface.blit(self.wall_sprites['v'], (dx, dy))
 
     def draw_stairs(self, surface):
@@ -489,20 +621,6 @@ class MazeLoader:
         if img:
             surface.blit(img, (dx, dy))
 
-    def check_trap_collision(self, x, y):
-        for t in self.traps:
-            if t.check_collision(x, y): return t
-        return None
-
-    def check_key_collision(self, x, y):
-        if self.key_obj and self.key_obj.check_collision(x, y):
-            self.key_obj.activate()
-            if self.gate_obj:
-                self.gate_obj.toggle()
-            sfx_manager.play('gate')
-            return True
-        return False
-
     def face_enemies_to_player(self, player):
         for e in self.enemies_list:
             if not e.is_moving and not e.is_dead and e.state.name != 'DIE':
@@ -0,0 +1,90 @@
+class OccupancyGrid:
+    """
+    What stands on every board cell: enemies, traps and the key.
+
+    Owned by MazeLoader and kept in step with the entities instead of being
+    rebuilt: an enemy files itself again every time it starts a step, deaths
+    go through `remove`, undo and reset through `rebuild`. "What is at
+    (x, y)" is then a list lookup rather than a scan over every object, and
+    the renderer gets each row's enemies and triggered traps directly.
+
+    A cell usually holds one enemy, but two share it for the moment a fight
+    plays out, so enemy lookups return lists.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.clear()
+
+    def clear(self):
+        cells = self.size * self.size
+        self._enemies = [[] for _ in range(cells)]
+        self._traps = [None] * cells
+        self._rows = [[] for _ in range(self.size)]
+        self._trap_rows = [[] for _ in range(self.size)]
+        self._cell_of = {}
+        self.key = None
+        self.key_cell = -1
+
+    def rebuild(self, enemies, traps=(), key=None):
+        """Files everything from scratch (level start, reset, undo)."""
+        for e in list(self._cell_of): e.occupancy = None
+        self.clear()
+        for t in traps:
+            if self.inside(t.grid_x, t.grid_y):
+                self._traps[t.grid_y * self.size + t.grid_x] = t
+                self._trap_rows[t.grid_y].append(t)
+        if key and self.inside(key.grid_x, key.grid_y):
+            self.key = key
+            self.key_cell = key.grid_y * self.size + key.grid_x
+        for e in enemies:
+            if not e.is_dead: self.add(e)
+
+    def inside(self, x, y):
+        return 0 <= x < self.size and 0 <= y < self.size
+
+    def add(self, enemy):
+        c = enemy.y * self.size + enemy.x
+        self._cell_of[enemy] = c
+        self._enemies[c].append(enemy)
+        self._rows[enemy.y].append(enemy)
+        enemy.occupancy = self
+
+    def remove(self, enemy):
+        c = self._cell_of.pop(enemy, None)
+        if c is None: return
+        self._enemies[c].remove(enemy)
+        self._rows[c // self.size].remove(enemy)
+        enemy.occupancy = None
+
+    def move(self, enemy):
+        """Re-files an enemy after its x / y changed."""
+        if self._cell_of.get(enemy) == enemy.y * self.size + enemy.x: return
+        self.remove(enemy)
+        self.add(enemy)
+
+    def enemies_at(self, x, y):
+        return self._enemies[y * self.size + x] if self.inside(x, y) else []
+
+    def enemy_at(self, x, y):
+        found = self.enemies_at(x, y)
+        return found[0] if found else None
+
+    def trap_at(self, x, y):
+        return self._traps[y * self.size + x] if self.inside(x, y) else None
+
+    def has_key(self, x, y):
+        return self.key_cell >= 0 and self.inside(x, y) and y * self.size + x == self.key_cell
+
+    def at(self, x, y):
+        """Everything on (x, y): its enemies, then the trap and the key if there are any."""
+        found = list(self.enemies_at(x, y))
+        trap = self.trap_at(x, y)
+        if trap: found.append(trap)
+        if self.has_key(x, y): found.append(self.key)
+        return found
+
+    def row_enemies(self, y):
+        return self._rows[y] if 0 <= y < self.size else []
+
+    def row_traps(self, y):
+        return self._trap_rows[y] if 0 <= y < self.size else []
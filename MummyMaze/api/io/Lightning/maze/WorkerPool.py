@@ -0,0 +1,149 @@
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from api.io.Lightning.maze.MazeGenerator import MazeGenerator
+from api.io.Lightning.solver.LevelSolver import STATE_BUDGET
+from api.io.Lightning.solver.SolveCache import SolveCache
+
+# Subinterpreter pools (an opt-in backend) arrived in Python 3.14
+try:
+    from concurrent.futures import InterpreterPoolExecutor
+except ImportError:
+    InterpreterPoolExecutor = None
+
+BACKENDS = ('thread', 'interpreter', 'process')
+_memory_cache = None
+
+
+def gil_enabled():
+    """False only on a free-threaded build running with the GIL switched off."""
+    check = getattr(sys, '_is_gil_enabled', None)
+    return check() if check else True
+
+
+def best_backend():
+    """
+    Threads when the GIL is off, else processes. Subinterpreters are opt-in
+    only: numpy cannot be imported in one, so VectorSolver is lost there.
+    """
+    return 'process' if gil_enabled() else 'thread'
+
+
+class WorkerPool:
+    """
+    Runs independent solver and generator jobs on several cores.
+
+    Each job builds its own LevelModel / MazeGenerator (with its own seeded
+    RNG), so jobs share nothing mutable except the SolveCache, which locks.
+    On a free-threaded build the jobs run on plain threads with no pickling or
+    start-up cost; otherwise each worker is a process. `backend` forces one
+    of BACKENDS ('interpreter' runs without the numpy engine).
+
+        with WorkerPool() as pool:
+            levels = pool.generate('hard', 8, seed=42)
+    """
+    def __init__(self, workers=None, backend=None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.backend = backend or best_backend()
+        if self.backend not in BACKENDS: raise ValueError(f"Unknown worker backend: {self.backend}")
+        if self.backend == 'interpreter' and InterpreterPoolExecutor is None:
+            raise ValueError("Subinterpreter pools need Python 3.14 or newer")
+        self._executor = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        if self._executor: return
+        if self.backend == 'thread':
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='maze-worker')
+        elif self.backend == 'interpreter':
+            print("[Warning] Subinterpreter workers cannot import numpy, they solve without VectorSolver")
+            # A fresh interpreter only knows the default sys.path; `exec` is a
+            # builtin, so it can be sent over before our modules are importable
+            paths = [p for p in sys.path if p]
+            self._executor = InterpreterPoolExecutor(self.workers, initializer=exec,
+                                                     initargs=(f"__import__('sys').path[:0] = {paths!r}",))
+        else:
+            self._executor = ProcessPoolExecutor(self.workers)
+
+    def close(self):
+        if self._executor: self._executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = None
+
+    def submit(self, fn, *args):
+        """Schedules a module-level function (it is pickled for interpreters and processes)."""
+        self.start()
+        return self._executor.submit(fn, *args)
+
+    def solve_all(self, levels, max_states=STATE_BUDGET):
+        """Solvability results (SolveResult, None on error) for a list of (level, size), in order."""
+        futures = [self.submit(_solve_job, level, size, max_states) for level, size in levels]
+        return [f.result() for f in futures]
+
+    def generate(self, difficulty, count, seed=0, size=None):
+        """`count` levels as (level, stats dict); job i uses seed + i, so a batch is reproducible."""
+        futures = [self.submit(_generate_job, difficulty, size, seed + i) for i in range(count)]
+        return [f.result() for f in futures]
+
+    def imap(self, fn, jobs, window=None):
+        """
+        Yields fn(*args) for every args tuple of `jobs`, in order, while at most
+        `window` jobs (four per worker by default) are queued or running.
+        """
+        window = window or self.workers * 4
+        pending = deque()
+        for args in jobs:
+            pending.append(self.submit(fn, *args))
+            if len(pending) >= window: yield pending.popleft().result()
+        while pending: yield pending.popleft().result()
+
+    def generate_batch(self, jobs, analyze=False, window=None):
+        """Streams one result dict (see _batch_job) per (difficulty, size, seed) of `jobs`, in order."""
+        return self.imap(_batch_job, ((difficulty, size, seed, analyze) for difficulty, size, seed in jobs), window)
+
+
+def _solve_job(level, size, max_states):
+    generator = MazeGenerator(cache=_worker_cache(), seed=0, verbose=False)
+    generator._is_level_solvable(level, size, max_states)
+    return generator.last_solve
+
+
+def _generate_job(difficulty, size, seed):
+    generator = MazeGenerator(cache=_worker_cache(), seed=seed, verbose=False)
+    level = generator.generate_level(difficulty, size)
+    return level, generator.last_stats.as_dict()
+
+
+def _worker_cache():
+    """Memory-only SolveCache of this worker: batch levels are new, and workers would fight over the sqlite file."""
+    global _memory_cache
+    if _memory_cache is None: _memory_cache = SolveCache(path=None)
+    return _memory_cache
+
+
+def _batch_job(difficulty, size, seed, analyze):
+    """
+    One generate_level run that never raises: a fallback map or an exception
+    becomes `error`. `worker` (pid:thread) and `seconds` feed throughput reports.
+    """
+    started = time.perf_counter()
+    level = solutions = error = None
+    try:
+        generator = MazeGenerator(cache=_worker_cache(), seed=seed, analyze=analyze, verbose=False)
+        level = generator.generate_level(difficulty, size)
+        stats = generator.last_stats
+        if stats.fallback: level, error = None, 'timed out (fallback map)'
+        elif stats.solutions: solutions = stats.solutions.as_dict()
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {'difficulty': difficulty, 'size': size, 'seed': seed, 'level': level, 'solutions': solutions,
+            'error': error, 'worker': f"{os.getpid()}:{threading.get_native_id()}",
+            'seconds': time.perf_counter() - started}
@@ -99,6 +99,13 @@ class Gate:
         if self.state == self.STATE_OPEN:
             self.state = self.STATE_CLOSING
 
+    def set_open(self, gate_open):
+        """Heads for the given state, also mid-animation (two toggles can land in one turn)."""
+        if gate_open and self.is_blocking():
+            self.state = self.STATE_OPENING
+        elif not gate_open and not self.is_blocking():
+            self.state = self.STATE_CLOSING
+
     def is_blocking(self):
         return self.state == self.STATE_CLOSED or self.state == self.STATE_CLOSING
 
@@ -0,0 +1,292 @@
+from api.io.Lightning.entities.EnemyMoveTable import EnemyMoveTable, STRENGTH
+from api.io.Lightning.solver.Pruning import PruneStats, player_region, enemy_reach
+from api.io.Lightning.solver.StateCodec import StateCodec
+from api.io.Lightning.utils.MazeGraph import MazeGraph, UNREACHED
+from api.io.Lightning.utils.WallGrid import WallGrid, BLOCK_UP, BLOCK_DOWN, BLOCK_LEFT, BLOCK_RIGHT
+
+# Player actions in search order: wait, down, up, right, left
+ACTIONS = ((0, 0), (0, 1), (0, -1), (1, 0), (-1, 0))
+UNREACHABLE = 0xFF
+
+# Turn events reported by LevelModel.step, each the head of a tuple
+PLAYER_MOVE = 'player_move'
+KEY_TOGGLE = 'key_toggle'
+TRAPPED = 'trapped'
+WON = 'won'
+ENEMY_MOVE = 'enemy_move'
+FIGHT = 'fight'
+CAUGHT = 'caught'
+
+
+class LevelModel:
+    """
+    Turn rules of one level as a pure transition function over packed state keys.
+
+    `level` is a level/snapshot dict (player, exit, enemies, walls, traps, gate,
+    key, optional gate_open). `step` plays one full turn and reports what
+    happened as events; `successors` is the same turn without the event list,
+    for the searches. The UI animates `step`'s events, so the game and the
+    solvers share one set of rules:
+
+      - the player moves or waits; walls and enemies block, stepping onto the
+        key (not standing on it) toggles the gate, a trap kills, the exit
+        wins at once;
+      - then each enemy takes its whole turn in slot order (type, then cell),
+        chasing the player from where the gate stands at that moment. Every
+        step onto the player catches them, onto another enemy starts a fight
+        the stronger one survives (the mover on a tie; a beaten mover stops
+        there), onto the key toggles the gate.
+
+    Enemies that can never reach the player, the key or another enemy's
+    ground are left out of the state (`prune=False` keeps them all), and
+    `prunes` counts what each pruning rule removed.
+    """
+    def __init__(self, level, size, difficulty='medium', prune=True):
+        self.size = size
+        self.cells = size * size
+        self.grid = WallGrid(size, level['walls'], level.get('gate'))
+        self.has_gate = self.grid.gate is not None
+        self.table = EnemyMoveTable.for_grid(self.grid, difficulty)
+        self.prunes = PruneStats()
+
+        key = level.get('key')
+        self.key_cell = int(key['y']) * size + int(key['x']) if key else -1
+        # The key only does something when there is a gate for it to toggle
+        self.switch_cell = self.key_cell if self.has_gate else -1
+        ex, ey = int(level['exit']['x']), int(level['exit']['y'])
+        self.win_cell = max(0, min(size - 1, ey)) * size + max(0, min(size - 1, ex))
+        self.traps = bytearray(self.cells)
+        for t in level.get('traps', []):
+            self.traps[int(t['y']) * size + int(t['x'])] = 1
+
+        start_cell = int(level['player']['y']) * size + int(level['player']['x'])
+        self.region = player_region(self.grid, start_cell, self.traps)
+        self._reach = {}
+        self.ignored = self._isolated_ground(level['enemies']) if prune else bytearray(self.cells)
+        enemies = self.relevant_enemies(level['enemies'])
+        self.prunes.hit('stuck_enemy', len(level['enemies']) - len(enemies))
+        self.codec = StateCodec(size, [e['type'] for e in enemies])
+        self.slot_types = self.codec.slot_types
+        self._strength = [STRENGTH.get(t, 0) for t in self.slot_types]
+        # Cells an enemy can walk in one turn: mummies two, scorpions one
+        self._steps = [2 if 'mummy' in t else 1 for t in self.slot_types]
+        self._escapes = self._balls = None  # bitmasks for _dead_end, built on first use
+        # Cells each kept enemy can ever pass through, in level order
+        self.enemies = enemies
+        self.enemy_reaches = [self._enemy_reach(e['type'], int(e['y']) * size + int(e['x'])) for e in enemies]
+
+        gate_open = level.get('gate_open', False) or not self.has_gate
+        self.start = self.codec.encode(start_cell, gate_open, self.codec.slots_from_level(enemies))
+        self.valid = not (self.traps[start_cell] or self.traps[self.win_cell])
+        # (cell delta, blocked bit) per action, matching ACTIONS
+        self.moves = ((0, 0), (size, BLOCK_DOWN), (-size, BLOCK_UP), (1, BLOCK_RIGHT), (-1, BLOCK_LEFT))
+        self.gate_bit = 1 << self.codec.bits
+        self._win_distance = None
+
+    def _isolated_ground(self, enemies):
+        """
+        Mask of the cells only stuck enemies can reach: enemies whose reach
+        misses the player region, the key and every other enemy's reach,
+        so nothing they do can ever matter. An enemy only ever moves inside
+        its own reach, so later snapshots are classified the same way.
+        """
+        reaches = [int.from_bytes(self._enemy_reach(e['type'], int(e['y']) * self.size + int(e['x'])), 'little')
+                   for e in enemies]
+        touched = int.from_bytes(self.region, 'little')
+        if self.switch_cell >= 0: touched |= 1 << (8 * self.switch_cell)
+        ground = 0
+        for i, r in enumerate(reaches):
+            if r & touched or any(r & o for j, o in enumerate(reaches) if j != i): continue
+            ground |= r
+        return bytearray(ground.to_bytes(self.cells, 'little'))
+
+    def relevant_enemies(self, enemies):
+        """Enemy dicts that take part in the state (the ones on isolated ground are dropped)."""
+        return [e for e in enemies if not self.ignored[int(e['y']) * self.size + int(e['x'])]]
+
+    def _enemy_reach(self, etype, cell):
+        if (etype, cell) not in self._reach:
+            self._reach[(etype, cell)] = enemy_reach(self.grid, etype, cell, self.region, self.table.hard)
+        return self._reach[(etype, cell)]
+
+    def slot_order(self, enemies):
+        """
+        Index into `enemies` (dicts with type, x, y) of the enemy in every
+        slot, -1 for a slot whose enemy has died; None if the enemies do not
+        fit this level's slots. Dropped enemies get no slot.
+        """
+        codec = self.codec
+        cells = {}
+        for i, e in enumerate(enemies):
+            c = int(e['y']) * self.size + int(e['x'])
+            if not self.ignored[c]: cells.setdefault(e['type'], []).append((c, i))
+        order = []
+        for etype in dict.fromkeys(self.slot_types):
+            found = sorted(cells.pop(etype, []))
+            count = self.slot_types.count(etype)
+            if len(found) > count: return None
+            order += [i for _, i in found] + [-1] * (count - len(found))
+        return None if cells else order
+
+    def key_for(self, snapshot):
+        """State key of a snapshot of this level (some enemies may have died), None if it does not fit."""
+        order = self.slot_order(snapshot['enemies'])
+        if order is None: return None
+        enemies = snapshot['enemies']
+        pcell = int(snapshot['player']['y']) * self.size + int(snapshot['player']['x'])
+        gate_open = snapshot.get('gate_open', False) or not self.has_gate
+        return self.codec.encode(pcell, gate_open, [self.codec.dead if i < 0 else
+                                                    int(enemies[i]['y']) * self.size + int(enemies[i]['x'])
+                                                    for i in order])
+
+    def is_win(self, key):
+        return key & self.codec.cell_mask == self.win_cell
+
+    def step(self, key, action):
+        """
+        Plays ACTIONS[action] from `key`. -> (next key, events): the key is
+        None when the move is illegal (no events then) or the player dies.
+        Events are tuples, in the order they happen; slots index the enemy
+        cells of `key`:
+
+            (PLAYER_MOVE, from, to)       (ENEMY_MOVE, slot, from, to)
+            (KEY_TOGGLE, slot, gate_open)  slot -1 is the player
+            (FIGHT, winner, loser, cell)  (CAUGHT, slot, cell)
+            (TRAPPED, cell)               (WON, cell)
+        """
+        p, g_open, ecells = self.codec.decode(key)
+        events = []
+        after = self._turn(p, g_open, ecells, action, events)
+        if after is None: return None, tuple(events)
+        return self.codec.encode(*after), tuple(events)
+
+    def successors(self, key, dead_ends=True):
+        """
+        -> list of (action index, next key) for every move that does not get
+        the player killed. With `dead_ends`, successors from which every move
+        loses are dropped too: no win passes through them, so searches give
+        the same verdicts and lengths without ever queueing them (the
+        tablebase keeps them, for instant LOST lookups).
+        """
+        codec = self.codec
+        p, g_open, ecells = codec.decode(key)
+        out = []
+        for a in range(len(self.moves)):
+            after = self._turn(p, g_open, ecells, a)
+            if after is None: continue
+            nk = codec.encode(*after)
+            # Waiting while nothing moves only loops back to this state
+            if nk == key:
+                self.prunes.counts['wait_loop'] += 1
+                continue
+            if dead_ends and self._dead_end(*after):
+                self.prunes.counts['dead_end'] += 1
+                continue
+            out.append((a, nk))
+        return out
+
+    def _dead_end(self, p, g_open, ecells):
+        """
+        True if every move from this decoded state loses. A legal move onto
+        a cell no enemy can walk through this turn survives whatever the gate
+        and fights do, so (with cell bitmasks) only states without such a
+        move are played out.
+        """
+        if self._escapes is None: self._build_escape_masks()
+        targets = self._escapes[g_open][p]
+        if targets >> self.win_cell & 1: return False
+        threat, dead = 0, self.codec.dead
+        for e, ball in zip(ecells, self._balls):
+            if e != dead: threat |= ball[e]
+        if targets & ~threat: return False
+        return all(self._turn(p, g_open, ecells, a) is None for a in range(len(self.moves)))
+
+    def _build_escape_masks(self):
+        """
+        Per gate state and cell, the cells one legal move reaches (traps left
+        out); per slot and cell, the cells that enemy can walk through in one
+        turn. The gate may toggle mid-turn, so enemy steps follow the walls
+        of either gate state.
+        """
+        cells = self.cells
+        self._escapes = {}
+        step = [1 << c for c in range(cells)]
+        for g_open in (False, True):
+            masks = self.grid.get_masks(g_open)
+            self._escapes[g_open] = [sum(1 << (c + delta) for delta, bit in self.moves
+                                         if not masks[c] & bit and not self.traps[c + delta])
+                                     for c in range(cells)]
+            for c in range(cells):
+                for delta, bit in self.moves:
+                    if not masks[c] & bit: step[c] |= 1 << (c + delta)
+        reach = {1: step}
+        if 2 in self._steps:
+            reach[2] = [0] * cells
+            for c in range(cells):
+                near = step[c]
+                while near:
+                    low = near & -near
+                    reach[2][c] |= step[low.bit_length() - 1]
+                    near ^= low
+        self._balls = [reach[steps] for steps in self._steps]
+
+    def _turn(self, p, g_open, ecells, action, events=None):
+        """
+        The turn rules on a decoded state. -> (player cell, gate open, enemy
+        cells) after the turn, None if the move is illegal or loses. Events are
+        appended to `events` when a list is given.
+        """
+        delta, bit = self.moves[action]
+        if self.grid.get_masks(g_open)[p] & bit: return None
+        n = p + delta
+        if n in ecells: return None
+        if events is not None: events.append((PLAYER_MOVE, p, n))
+        switch = self.switch_cell
+        if action and n == switch:
+            g_open = not g_open
+            if events is not None: events.append((KEY_TOGGLE, -1, g_open))
+        if self.traps[n]:
+            if events is not None: events.append((TRAPPED, n))
+            return None
+        if n == self.win_cell:
+            if events is not None: events.append((WON, n))
+            return n, g_open, ecells
+
+        table, dead, strength = self.table, self.codec.dead, self._strength
+        ecells = list(ecells)
+        for i, etype in enumerate(self.slot_types):
+            e = ecells[i]
+            if e == dead: continue
+            for c in table.path(etype, e, n, g_open):
+                ecells[i] = c
+                if events is not None: events.append((ENEMY_MOVE, i, e, c))
+                if c == switch:
+                    g_open = not g_open
+                    if events is not None: events.append((KEY_TOGGLE, i, g_open))
+                if c == n:
+                    if events is not None: events.append((CAUGHT, i, c))
+                    return None
+                if ecells.count(c) > 1:
+                    j = next(k for k, o in enumerate(ecells) if o == c and k != i)
+                    if strength[i] >= strength[j]:
+                        ecells[j] = dead
+                        if events is not None: events.append((FIGHT, i, j, c))
+                    else:
+                        ecells[i] = dead
+                        if events is not None: events.append((FIGHT, j, i, c))
+                        break
+                e = c
+        return n, g_open, ecells
+
+    def win_distance(self):
+        """
+        Path distance from every cell to the win cell, ignoring enemies and
+        treating the gate as open (bytearray, UNREACHABLE if cut off), taken
+        from the corridor-contracted MazeGraph with traps left out. It never
+        overestimates the real number of moves, so it is an admissible heuristic.
+        """
+        if self._win_distance is None:
+            graph = MazeGraph(self.grid, True, self.traps)
+            self._win_distance = bytearray(UNREACHABLE if d == UNREACHED else min(d, UNREACHABLE - 1)
+                                           for d in graph.distances_from(self.win_cell))
+        return self._win_distance
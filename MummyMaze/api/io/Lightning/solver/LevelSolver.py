@@ -0,0 +1,338 @@
+import heapq
+import time
+from enum import Enum
+from api.io.Lightning.solver.LevelModel import LevelModel, ACTIONS, UNREACHABLE
+
+# Max states a search may expand before giving up
+STATE_BUDGET = 10000
+# Memory-bounded modes: IDA* keeps at most TABLE_SIZE transpositions,
+# beam search keeps BEAM_WIDTH states per layer for up to BEAM_DEPTH layers
+IDA_STATE_BUDGET = 200000
+TABLE_SIZE = 1 << 16
+BEAM_WIDTH = 256
+BEAM_DEPTH = 200
+
+
+class SolveStatus(Enum):
+    SOLVED = "solved"
+    UNSOLVABLE = "unsolvable"
+    BUDGET_EXHAUSTED = "budget_exhausted"
+
+
+class SolveResult:
+    def __init__(self, status, moves=None, length=None, expanded=0):
+        self.status = status
+        self.moves = moves      # list of (dx, dy), (0, 0) = wait
+        self.length = length
+        self.expanded = expanded
+        self.mode = None        # search that produced the result: astar, bfs, ida, beam, ...
+        self.budget = {}        # limits it ran under
+        self.optimal = True     # False when `length` may not be the shortest (beam)
+        self.prunes = {}        # states removed per pruning rule, see Pruning.RULES
+        self.peak_frontier = 0  # largest open list / layer / path the search held
+        self.visited = 0        # states it stored as seen
+        self.seconds = 0.0
+
+    @property
+    def solved(self):
+        return self.status == SolveStatus.SOLVED
+
+    @property
+    def proven(self):
+        """True if the verdict is a proof; a BUDGET_EXHAUSTED run says nothing about the level."""
+        return self.status != SolveStatus.BUDGET_EXHAUSTED
+
+    def sized(self, peak_frontier, visited):
+        self.peak_frontier = peak_frontier
+        self.visited = visited
+        return self
+
+    def tag(self, mode, optimal=True, prunes=None, **budget):
+        self.mode = mode
+        self.optimal = optimal
+        self.budget = budget
+        if prunes is not None: self.prunes = prunes.as_dict()
+        return self
+
+    def as_dict(self):
+        return {'mode': self.mode, 'status': self.status.value, 'length': self.length, 'optimal': self.optimal,
+                'expanded': self.expanded, 'peak_frontier': self.peak_frontier, 'visited': self.visited,
+                'seconds': round(self.seconds, 4), 'budget': dict(self.budget), 'prunes': dict(self.prunes)}
+
+    def __repr__(self):
+        return f"SolveResult({self.status.value}, mode={self.mode}, length={self.length}, expanded={self.expanded})"
+
+
+class LevelSolver:
+    """
+    Shortest-solution search over a LevelModel.
+
+    `solve` is A* guided by the wall-aware distance to the win cell, so the
+    move list it returns is optimal. `bfs` is the plain layered search used to
+    check a verdict or a solution length. `ida` and `beam` run in a fixed
+    amount of memory for levels too big for either; every result is tagged
+    with the mode and budget that produced it.
+    """
+    def __init__(self, model):
+        self.model = model
+
+    @staticmethod
+    def for_level(level, size, difficulty=None):
+        return LevelSolver(LevelModel(level, size, difficulty or level.get('difficulty', 'medium')))
+
+    def solve(self, max_states=STATE_BUDGET):
+        started = time.perf_counter()
+        return self._finish(self.search().run(max_states), 'astar', started, max_states=max_states)
+
+    def search(self):
+        """Resumable A* run, see AStarSearch."""
+        return AStarSearch(self.model)
+
+    def bfs(self, max_states=STATE_BUDGET):
+        """Layered BFS; reports the optimal length but not the moves."""
+        started = time.perf_counter()
+        return self._finish(self._bfs(max_states), 'bfs', started, max_states=max_states)
+
+    def ida(self, max_states=IDA_STATE_BUDGET, table_size=TABLE_SIZE):
+        """Optimal moves in memory bounded by the solution depth plus `table_size` table entries."""
+        started = time.perf_counter()
+        return self._finish(IDAStarSearch(self.model, table_size).run(max_states), 'ida', started,
+                            max_states=max_states, table_size=table_size)
+
+    def beam(self, width=BEAM_WIDTH, max_depth=BEAM_DEPTH):
+        """Moves found by keeping only the `width` most promising states per layer; may not be the shortest."""
+        started = time.perf_counter()
+        return self._finish(BeamSearch(self.model, width).run(max_depth), 'beam', started, optimal=False,
+                            width=width, max_depth=max_depth)
+
+    def _finish(self, result, mode, started, optimal=True, **budget):
+        result.seconds = time.perf_counter() - started
+        return result.tag(mode, optimal, self.model.prunes, **budget)
+
+    def _bfs(self, max_states):
+        model = self.model
+        if not model.valid: return SolveResult(SolveStatus.UNSOLVABLE)
+        codec = model.codec
+        visited = codec.new_visited()
+        visited.add(model.start)
+        layer = codec.new_frontier()
+        layer.append(model.start)
+        depth = expanded = peak = 0
+
+        def done(status, length=None):
+            return SolveResult(status, length=length, expanded=expanded).sized(peak, len(visited))
+
+        while layer:
+            peak = max(peak, len(layer))
+            next_layer = codec.new_frontier()
+            for key in layer:
+                if model.is_win(key): return done(SolveStatus.SOLVED, depth)
+                expanded += 1
+                if expanded > max_states: return done(SolveStatus.BUDGET_EXHAUSTED)
+                for _, nxt in model.successors(key):
+                    if visited.add(nxt): next_layer.append(nxt)
+            layer = next_layer
+            depth += 1
+        return done(SolveStatus.UNSOLVABLE)
+
+
+class AStarSearch:
+    """
+    A* towards the win cell with an admissible heuristic (LevelModel.win_distance).
+
+    `run(budget)` expands at most `budget` more states. If it returns
+    BUDGET_EXHAUSTED the search keeps its frontier and the next `run` call
+    continues where it stopped.
+    """
+    def __init__(self, model):
+        self.model = model
+        self.expanded = 0
+        self.peak_frontier = 1
+        self.result = None
+        self.h = model.win_distance()
+        start = model.start
+        self.parent = {start: None}
+        self.best_g = {start: 0}
+        self.frontier = []
+        if not model.valid or self.h[start & model.codec.cell_mask] == UNREACHABLE:
+            self.result = SolveResult(SolveStatus.UNSOLVABLE)
+        else:
+            self.frontier.append((self.h[start & model.codec.cell_mask], 0, start))
+
+    @property
+    def finished(self):
+        return self.result is not None
+
+    def run(self, budget=STATE_BUDGET):
+        if self.result: return self.result
+        model, h, parent, best_g, frontier = self.model, self.h, self.parent, self.best_g, self.frontier
+        mask = model.codec.cell_mask
+        limit = self.expanded + budget
+        while frontier:
+            f, neg_g, key = frontier[0]
+            g = -neg_g
+            if g > best_g[key]:
+                heapq.heappop(frontier)
+                continue
+            if model.is_win(key):
+                moves = self._rebuild(parent, key)
+                self.result = self._result(SolveStatus.SOLVED, moves)
+                return self.result
+            if self.expanded >= limit: return self._result(SolveStatus.BUDGET_EXHAUSTED)
+            heapq.heappop(frontier)
+            self.expanded += 1
+
+            for action, nxt in model.successors(key):
+                hn = h[nxt & mask]
+                if hn == UNREACHABLE: continue
+                if nxt in best_g and best_g[nxt] <= g + 1: continue
+                best_g[nxt] = g + 1
+                parent[nxt] = (key, action)
+                # Ties on f go to the deeper state
+                heapq.heappush(frontier, (g + 1 + hn, -(g + 1), nxt))
+            if len(frontier) > self.peak_frontier: self.peak_frontier = len(frontier)
+        self.result = self._result(SolveStatus.UNSOLVABLE)
+        return self.result
+
+    def _result(self, status, moves=None):
+        length = len(moves) if moves is not None else None
+        return SolveResult(status, moves, length, self.expanded).sized(self.peak_frontier, len(self.best_g))
+
+    @staticmethod
+    def _rebuild(parent, key):
+        moves = []
+        while parent[key] is not None:
+            key, action = parent[key]
+            moves.append(ACTIONS[action])
+        moves.reverse()
+        return moves
+
+
+class IDAStarSearch:
+    """
+    Iterative-deepening A*: repeated depth-first passes with a growing bound
+    on g + h, keeping only the current path in memory. A transposition table
+    of at most `table_size` entries remembers the smallest g each state was
+    reached with during the pass, so re-reaching it no cheaper is skipped;
+    once the table is full, new states are simply searched again.
+    A pass that prunes nothing on the bound proves the level unsolvable.
+    """
+    def __init__(self, model, table_size=TABLE_SIZE):
+        self.model = model
+        self.table_size = table_size
+        self.h = model.win_distance()
+        self.expanded = 0
+        self.peak_frontier = 1
+
+    def _children(self, key):
+        """Successors worth trying, best last (the DFS pops from the end)."""
+        h, mask = self.h, self.model.codec.cell_mask
+        # A dead-end child costs one failed expansion here, the same as checking it
+        out = [(h[nxt & mask], a, nxt) for a, nxt in self.model.successors(key, dead_ends=False)
+               if h[nxt & mask] != UNREACHABLE]
+        out.sort(reverse=True)
+        return out
+
+    def run(self, max_states=IDA_STATE_BUDGET):
+        model, h = self.model, self.h
+        mask = model.codec.cell_mask
+        start = model.start
+        if not model.valid or h[start & mask] == UNREACHABLE: return SolveResult(SolveStatus.UNSOLVABLE)
+        if model.is_win(start): return SolveResult(SolveStatus.SOLVED, [], 0)
+        bound = h[start & mask]
+        while True:
+            table = {start: 0}
+            next_bound = None
+            on_path = {start}
+            moves = []
+            stack = [(start, self._children(start))]
+            while stack:
+                key, children = stack[-1]
+                if not children:
+                    stack.pop()
+                    on_path.discard(key)
+                    if moves: moves.pop()
+                    continue
+                hn, action, nxt = children.pop()
+                g = len(stack)
+                if g + hn > bound:
+                    if next_bound is None or g + hn < next_bound: next_bound = g + hn
+                    continue
+                if nxt in on_path: continue
+                if model.is_win(nxt):
+                    moves.append(ACTIONS[action])
+                    return self._result(SolveStatus.SOLVED, moves, table)
+                seen = table.get(nxt)
+                if seen is not None and seen <= g: continue
+                if seen is not None or len(table) < self.table_size: table[nxt] = g
+                self.expanded += 1
+                if self.expanded > max_states: return self._result(SolveStatus.BUDGET_EXHAUSTED, None, table)
+                on_path.add(nxt)
+                moves.append(ACTIONS[action])
+                stack.append((nxt, self._children(nxt)))
+                if len(stack) > self.peak_frontier: self.peak_frontier = len(stack)
+            if next_bound is None: return self._result(SolveStatus.UNSOLVABLE, None, table)
+            bound = next_bound
+
+    def _result(self, status, moves, table):
+        length = len(moves) if moves is not None else None
+        return SolveResult(status, moves, length, self.expanded).sized(self.peak_frontier, len(table))
+
+
+class BeamSearch:
+    """
+    Breadth-first search that keeps only the `width` states closest to the
+    win cell in each layer. Memory is width x depth parent links. A solution
+    it finds is real but may not be the shortest; running out of states only
+    proves the level unsolvable if no layer was ever cut.
+    """
+    def __init__(self, model, width=BEAM_WIDTH):
+        self.model = model
+        self.width = width
+        self.h = model.win_distance()
+        self.expanded = 0
+
+    def run(self, max_depth=BEAM_DEPTH):
+        model, h, width = self.model, self.h, self.width
+        mask = model.codec.cell_mask
+        start = model.start
+        if not model.valid or h[start & mask] == UNREACHABLE: return SolveResult(SolveStatus.UNSOLVABLE)
+        if model.is_win(start): return SolveResult(SolveStatus.SOLVED, [], 0)
+        # layers[d][i] = (key, index of the parent in layer d - 1, action)
+        layers = [[(start, -1, 0)]]
+        seen = {start}
+        cut = False
+        peak = 1
+        for _ in range(max_depth):
+            children = []
+            for i, (key, _, _) in enumerate(layers[-1]):
+                self.expanded += 1
+                for action, nxt in model.successors(key):
+                    if nxt in seen or h[nxt & mask] == UNREACHABLE: continue
+                    seen.add(nxt)
+                    if model.is_win(nxt):
+                        layers.append([(nxt, i, action)])
+                        moves = self._rebuild(layers)
+                        return SolveResult(SolveStatus.SOLVED, moves, len(moves), self.expanded).sized(peak, len(seen))
+                    children.append((h[nxt & mask], nxt, i, action))
+            if not children: break
+            if len(children) > width:
+                children.sort()
+                del children[width:]
+                cut = True
+            layers.append([(nxt, i, action) for _, nxt, i, action in children])
+            peak = max(peak, len(children))
+        else:
+            cut = True
+        status = SolveStatus.BUDGET_EXHAUSTED if cut else SolveStatus.UNSOLVABLE
+        return SolveResult(status, expanded=self.expanded).sized(peak, len(seen))
+
+    @staticmethod
+    def _rebuild(layers):
+        moves = []
+        i = 0
+        for layer in reversed(layers[1:]):
+            _, i, action = layer[i]
+            moves.append(ACTIONS[action])
+        moves.reverse()
+        return moves
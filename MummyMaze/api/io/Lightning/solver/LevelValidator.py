@@ -0,0 +1,79 @@
+from api.io.Lightning.solver.LevelModel import LevelModel
+from api.io.Lightning.solver.LevelSolver import LevelSolver, SolveResult, SolveStatus
+from api.io.Lightning.solver.Pruning import player_region
+
+# Cheap necessary conditions, in the order they run. The first three cost a
+# flood fill or one expansion, the last a search over (player, enemy, gate)
+# states; a level failing any of them can never be won. The names double as
+# GenerationStats failure reasons.
+CHEAP_TIERS = ('exit_unreachable', 'key_unreachable', 'captured_first_move', 'lost_to_one_enemy')
+# One-enemy searches only pay off where the full search is expensive
+RELAX_MIN_CELLS = 100
+RELAX_STATE_BUDGET = 5000
+
+
+class LevelValidator:
+    """
+    Staged solvability check. The cheap tiers reject levels that are plainly
+    broken (exit walled off, gate locked with the key out of reach, every
+    first move fatal, one enemy alone already unbeatable) before the full
+    solver is called; only the survivors are handed to `solve`, a callable
+    LevelModel -> SolveResult.
+
+    `last_tier` names the tier that gave the last verdict: one of CHEAP_TIERS
+    for a cheap rejection (the result is a proven unsolvable tagged with that
+    name), 'solver' otherwise.
+    """
+    def __init__(self, solve):
+        self.solve = solve
+        self.last_tier = None
+
+    def check(self, level, size, difficulty='medium'):
+        model = LevelModel(level, size, difficulty)
+        for tier in CHEAP_TIERS:
+            if getattr(self, '_' + tier)(model, level, difficulty):
+                self.last_tier = tier
+                return SolveResult(SolveStatus.UNSOLVABLE).tag(tier)
+        self.last_tier = 'solver'
+        return self.solve(model)
+
+    @staticmethod
+    def _exit_unreachable(model, level, difficulty):
+        """No path to the exit even with no enemies and the gate open."""
+        return not model.valid or not model.region[model.win_cell]
+
+    @staticmethod
+    def _key_unreachable(model, level, difficulty):
+        """
+        The gate starts closed, stands between player and exit, and the key
+        is behind it (or missing) where no enemy can step on it either.
+        """
+        if not model.has_gate or model.start & model.gate_bit: return False
+        region = player_region(model.grid, model.start & model.codec.cell_mask, model.traps, gate_open=False)
+        if region[model.win_cell]: return False
+        if model.key_cell < 0: return True
+        return not region[model.key_cell] and not any(reach[model.key_cell] for reach in model.enemy_reaches)
+
+    @staticmethod
+    def _captured_first_move(model, level, difficulty):
+        """Every first move (waiting included) ends on an enemy or changes nothing."""
+        return not model.is_win(model.start) and not model.successors(model.start, dead_ends=False)
+
+    @staticmethod
+    def _lost_to_one_enemy(model, level, difficulty):
+        """
+        Some enemy beats the player even with every other enemy removed.
+        Only enemies that can never meet another one are tried, and only
+        while no other enemy can reach the key: then the rest never change
+        what that enemy does, so a plan that escapes them all also escapes
+        it alone.
+        """
+        if model.cells < RELAX_MIN_CELLS or len(model.enemies) < 2: return False
+        reaches = [int.from_bytes(r, 'little') for r in model.enemy_reaches]
+        key = 1 << (8 * model.switch_cell) if model.switch_cell >= 0 else 0
+        for i, enemy in enumerate(model.enemies):
+            others = [r for j, r in enumerate(reaches) if j != i]
+            if any(reaches[i] & r or key & r for r in others): continue
+            result = LevelSolver(LevelModel(dict(level, enemies=[enemy]), model.size, difficulty)).solve(RELAX_STATE_BUDGET)
+            if result.proven and not result.solved: return True
+        return False
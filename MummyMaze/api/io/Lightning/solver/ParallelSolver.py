@@ -0,0 +1,143 @@
+import multiprocessing
+import os
+import time
+from api.io.Lightning.solver.LevelModel import LevelModel
+from api.io.Lightning.solver.LevelSolver import SolveResult, SolveStatus
+
+# Total states all shards together may expand before giving up
+PARALLEL_STATE_BUDGET = 1000000
+HASH_MUL = 0x9E3779B97F4A7C15
+
+
+def shard_of(key, shards):
+    """Owner shard of a state key (Fibonacci hash, so neighbouring keys spread out)."""
+    return (((key * HASH_MUL) & 0xFFFFFFFFFFFFFFFF) >> 32) % shards
+
+
+class ParallelSolver:
+    """
+    Layered BFS spread over a pool of worker processes.
+
+    Every state key is owned by one shard (`shard_of`), and each worker keeps
+    the visited set and frontier of its own shard only. A layer runs in two
+    rounds: every worker expands its frontier and buckets the children by
+    owner, then each bucket is handed to its owner, which drops the states it
+    has already seen and keeps the rest as its next frontier. Verdicts and
+    lengths are the same as LevelSolver.bfs.
+
+    The workers stay alive between levels, so one pool can check a whole batch:
+
+        with ParallelSolver() as solver:
+            for level, size in levels: solver.bfs(level, size)
+    """
+    def __init__(self, workers=None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self._conns = []
+        self._procs = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        if self._procs: return
+        for shard in range(self.workers):
+            parent, child = multiprocessing.Pipe()
+            proc = multiprocessing.Process(target=_shard_worker, args=(child, shard, self.workers), daemon=True)
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+
+    def close(self):
+        for conn in self._conns:
+            try: conn.send(('stop',))
+            except (OSError, EOFError): pass
+        for proc in self._procs: proc.join(timeout=1)
+        for proc in self._procs:
+            if proc.is_alive(): proc.terminate()
+        self._conns, self._procs = [], []
+
+    def bfs(self, level, size, difficulty=None, max_states=PARALLEL_STATE_BUDGET):
+        difficulty = difficulty or level.get('difficulty', 'medium')
+        model = LevelModel(level, size, difficulty)
+        started = time.perf_counter()
+        result = self._bfs(model, level, size, difficulty, max_states)
+        result.seconds = time.perf_counter() - started
+        # Per-state counters stay in the workers, only the stuck-enemy count is known here
+        return result.tag('parallel', prunes=model.prunes, max_states=max_states, workers=self.workers)
+
+    def _bfs(self, model, level, size, difficulty, max_states):
+        if not model.valid: return SolveResult(SolveStatus.UNSOLVABLE)
+        if model.is_win(model.start): return SolveResult(SolveStatus.SOLVED, length=0)
+        self.start()
+        self._call(('load', level, size, difficulty))
+        layer_size, depth, expanded = 1, 0, 0
+        peak = stored = 1
+
+        def done(status, length=None):
+            return SolveResult(status, length=length, expanded=expanded).sized(peak, stored)
+
+        while layer_size:
+            peak = max(peak, layer_size)
+            if expanded + layer_size > max_states:
+                expanded += layer_size
+                return done(SolveStatus.BUDGET_EXHAUSTED)
+            expanded += layer_size
+            buckets = self._call(('expand',))
+            # buckets[i][j]: children found by worker i that worker j owns
+            replies = self._call([('absorb', [b[j] for b in buckets]) for j in range(self.workers)])
+            depth += 1
+            layer_size = sum(n for n, _ in replies)
+            stored += layer_size
+            if any(win for _, win in replies): return done(SolveStatus.SOLVED, depth)
+        return done(SolveStatus.UNSOLVABLE)
+
+    def _call(self, messages):
+        """Sends one message per worker (or the same one to all) and gathers the replies in order."""
+        if isinstance(messages, tuple): messages = [messages] * self.workers
+        for conn, msg in zip(self._conns, messages): conn.send(msg)
+        replies = [conn.recv() for conn in self._conns]
+        for r in replies:
+            if isinstance(r, tuple) and r and r[0] == 'error':
+                self.close()
+                raise RuntimeError(f"Solver worker failed: {r[1]}")
+        return replies
+
+
+def _shard_worker(conn, shard, shards):
+    model = visited = frontier = None
+    while True:
+        try: msg = conn.recv()
+        except EOFError: return
+        try:
+            if msg[0] == 'stop': return
+            if msg[0] == 'load':
+                _, level, size, difficulty = msg
+                model = LevelModel(level, size, difficulty)
+                visited = model.codec.new_visited()
+                frontier = model.codec.new_frontier()
+                if shard_of(model.start, shards) == shard:
+                    visited.add(model.start)
+                    frontier.append(model.start)
+                conn.send(None)
+            elif msg[0] == 'expand':
+                buckets = [model.codec.new_frontier() for _ in range(shards)]
+                for key in frontier:
+                    for _, nxt in model.successors(key):
+                        buckets[shard_of(nxt, shards)].append(nxt)
+                conn.send(buckets)
+            elif msg[0] == 'absorb':
+                frontier = model.codec.new_frontier()
+                win = False
+                for bucket in msg[1]:
+                    for key in bucket:
+                        if visited.add(key):
+                            frontier.append(key)
+                            win = win or model.is_win(key)
+                conn.send((len(frontier), win))
+        except Exception as e:
+            conn.send(('error', repr(e)))
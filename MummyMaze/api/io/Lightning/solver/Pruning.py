@@ -0,0 +1,86 @@
+from collections import deque
+from api.io.Lightning.utils.WallGrid import DIRECTIONS, BLOCK_UP, BLOCK_DOWN, BLOCK_LEFT, BLOCK_RIGHT
+
+# Pruning rules, in the order LevelModel applies them: enemies that can never
+# matter, waits that change nothing, and successors where every move loses
+RULES = ('stuck_enemy', 'wait_loop', 'dead_end')
+
+
+class PruneStats:
+    """How many enemies / states each pruning rule removed."""
+    def __init__(self):
+        self.counts = dict.fromkeys(RULES, 0)
+
+    def hit(self, rule, n=1):
+        self.counts[rule] += n
+
+    def __getitem__(self, rule):
+        return self.counts[rule]
+
+    def as_dict(self):
+        return dict(self.counts)
+
+    def __repr__(self):
+        return "PruneStats(" + ", ".join(f"{r}={n}" for r, n in self.counts.items()) + ")"
+
+
+def player_region(grid, cell, traps, gate_open=True):
+    """Cells the player can ever stand on from `cell` (traps excluded), as a bytearray mask."""
+    size = grid.size
+    masks = grid.get_masks(gate_open)
+    region = bytearray(size * size)
+    region[cell] = 1
+    q = deque([cell])
+    while q:
+        c = q.popleft()
+        x, y = c % size, c // size
+        for dx, dy, bit in DIRECTIONS:
+            if masks[c] & bit: continue
+            n = (y + dy) * size + x + dx
+            if not region[n] and not traps[n]:
+                region[n] = 1
+                q.append(n)
+    return region
+
+
+def enemy_reach(grid, etype, cell, region, hard=False):
+    """
+    Cells an enemy starting on `cell` can ever pass through while the player
+    stays inside `region`, as a bytearray mask. An edge counts as walkable if
+    some player cell would make the greedy chase pick it, with the gate
+    either open or closed; every step is checked on its own, so the result
+    is a superset of the real reach. Hard-mode red scorpions path-find and
+    get their whole wall region.
+    """
+    size = grid.size
+    targets = [(c % size, c // size) for c, inside in enumerate(region) if inside]
+    vertical_first = etype == 'red_mummy'
+    reach = bytearray(size * size)
+    reach[cell] = 1
+    q = deque([cell])
+    while q:
+        c = q.popleft()
+        x, y = c % size, c // size
+        for dx, dy, bit in DIRECTIONS:
+            if grid.masks[c] & bit: continue
+            n = (y + dy) * size + x + dx
+            if reach[n]: continue
+            if hard and etype == 'red_scorpion' or _chases(grid.closed_masks[c], x, y, dx, dy, targets, vertical_first):
+                reach[n] = 1
+                q.append(n)
+    return reach
+
+
+def _chases(mask, x, y, dx, dy, targets, vertical_first):
+    """True if some target makes a greedy enemy on (x, y) step by (dx, dy)."""
+    primary = (dy != 0) if vertical_first else (dx != 0)
+    for tx, ty in targets:
+        if primary:
+            # Chosen whenever the target lies on that side
+            if (tx - x) * dx > 0 or (ty - y) * dy > 0: return True
+        elif (tx - x) * dx > 0 or (ty - y) * dy > 0:
+            # Secondary axis: the primary one must be level or walled off
+            if vertical_first: side, bit = ty - y, (BLOCK_DOWN if ty > y else BLOCK_UP)
+            else: side, bit = tx - x, (BLOCK_RIGHT if tx > x else BLOCK_LEFT)
+            if side == 0 or mask & bit: return True
+    return False
@@ -0,0 +1,100 @@
+import time
+from api.io.Lightning.solver.LevelSolver import SolveStatus, STATE_BUDGET
+
+
+class SolutionCount:
+    """How many shortest solutions a level has and how much choice they leave."""
+    def __init__(self, status, length=None, solutions=0, decisions=0, forced=0, expanded=0):
+        self.status = status
+        self.length = length
+        self.solutions = solutions  # distinct shortest move sequences
+        self.decisions = decisions  # states some shortest solution passes through (win states excluded)
+        self.forced = forced        # of those, states with a single move that stays on a shortest solution
+        self.expanded = expanded
+        self.seconds = 0.0
+
+    @property
+    def solved(self):
+        return self.status == SolveStatus.SOLVED
+
+    @property
+    def unique(self):
+        return self.solutions == 1
+
+    @property
+    def forced_ratio(self):
+        return self.forced / self.decisions if self.decisions else 1.0
+
+    def as_dict(self):
+        return {'status': self.status.value, 'length': self.length, 'solutions': self.solutions,
+                'decisions': self.decisions, 'forced': self.forced, 'forced_ratio': round(self.forced_ratio, 4),
+                'expanded': self.expanded, 'seconds': round(self.seconds, 4)}
+
+    def __repr__(self):
+        return (f"SolutionCount({self.status.value}, length={self.length}, solutions={self.solutions}, "
+                f"forced={self.forced}/{self.decisions})")
+
+
+class SolutionCounter:
+    """
+    Counts shortest solutions by dynamic programming over the BFS layer graph.
+
+    The forward pass is LevelSolver.bfs (same LevelModel transitions) that
+    also keeps, for every state, its successors one layer further; it stops
+    after the first layer holding a win. The backward pass walks the layers
+    from the last one and gives each state the number of shortest move
+    sequences from it to a win: the sum over its kept successors, one per
+    action. Nothing is ever enumerated, so the cost is one
+    BFS plus the stored edges.
+    """
+    def __init__(self, model):
+        self.model = model
+
+    def run(self, max_states=STATE_BUDGET):
+        started = time.perf_counter()
+        result = self._count(max_states)
+        result.seconds = time.perf_counter() - started
+        return result
+
+    def _count(self, max_states):
+        model = self.model
+        if not model.valid: return SolutionCount(SolveStatus.UNSOLVABLE)
+        if model.is_win(model.start): return SolutionCount(SolveStatus.SOLVED, 0, solutions=1)
+        depth_of = {model.start: 0}
+        layers = [[model.start]]
+        edges = {}
+        expanded = 0
+        while True:
+            depth = len(layers)
+            next_layer = []
+            for key in layers[-1]:
+                expanded += 1
+                if expanded > max_states: return SolutionCount(SolveStatus.BUDGET_EXHAUSTED, expanded=expanded)
+                out = edges[key] = []
+                for _, nxt in model.successors(key):
+                    d = depth_of.get(nxt)
+                    if d is None:
+                        depth_of[nxt] = depth
+                        next_layer.append(nxt)
+                    elif d != depth: continue
+                    out.append(nxt)
+            if not next_layer: return SolutionCount(SolveStatus.UNSOLVABLE, expanded=expanded)
+            wins = [key for key in next_layer if model.is_win(key)]
+            if wins: break
+            layers.append(next_layer)
+
+        ways = dict.fromkeys(wins, 1)
+        decisions = forced = 0
+        for layer in reversed(layers):
+            for key in layer:
+                total = good = 0
+                for nxt in edges[key]:
+                    w = ways.get(nxt)
+                    if w:
+                        total += w
+                        good += 1
+                if total:
+                    ways[key] = total
+                    decisions += 1
+                    if good == 1: forced += 1
+        return SolutionCount(SolveStatus.SOLVED, depth, ways[model.start], decisions, forced, expanded)
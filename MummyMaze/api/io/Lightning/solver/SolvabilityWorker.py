@@ -0,0 +1,94 @@
+import threading
+from enum import Enum
+from api.io.Lightning.solver.LevelSolver import LevelSolver
+from api.io.Lightning.solver.SolveCache import SolveCache
+
+# States expanded per slice before the worker checks for cancellation
+SLICE_STATES = 500
+# Total states a single position may cost before the worker gives up (UNKNOWN)
+MAX_STATES = 200000
+
+
+class Solvability(Enum):
+    SOLVABLE = "solvable"
+    UNSOLVABLE = "unsolvable"
+    THINKING = "thinking"
+    UNKNOWN = "unknown"  # the search stopped without an answer
+
+
+class SolvabilityWorker:
+    """
+    Runs the solvability search for the current position on a background
+    thread so the render loop never waits for it.
+
+    `submit` cancels whatever was running and starts a new search; the search
+    is resumed slice by slice until it finds an answer, is cancelled, or hits
+    MAX_STATES. A search that stops without an answer (cap, error or cancel)
+    reports UNKNOWN, never SOLVABLE. `poll` returns the latest verdict,
+    THINKING while a search is still going.
+
+    The budget is per position: every turn moves the root, and a search from
+    the previous position says nothing about the new one, so there is no
+    tree to resume. Finished verdicts live on in the SolveCache instead.
+    """
+    def __init__(self, slice_states=SLICE_STATES, max_states=MAX_STATES, cache=None):
+        self.slice_states = slice_states
+        self.max_states = max_states
+        self.cache = cache if cache is not None else SolveCache.shared()
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._job = 0
+        self.state = Solvability.SOLVABLE
+        self.result = None
+
+    def submit(self, snapshot, size, difficulty=None):
+        self.cancel()
+        with self._lock:
+            self._job += 1
+            job = self._job
+            self._cancel = threading.Event()
+            self.state = Solvability.THINKING
+            self.result = None
+        t = threading.Thread(target=self._run, args=(job, self._cancel, snapshot, size, difficulty), daemon=True)
+        t.start()
+
+    def cancel(self):
+        """Stops the running search; a search cut short leaves the verdict UNKNOWN."""
+        with self._lock:
+            self._cancel.set()
+            self._job += 1
+            if self.state == Solvability.THINKING: self.state = Solvability.UNKNOWN
+
+    def set_state(self, state):
+        self.cancel()
+        with self._lock: self.state = state
+
+    def poll(self):
+        with self._lock: return self.state
+
+    def _run(self, job, cancel, snapshot, size, difficulty):
+        try:
+            solver = LevelSolver.for_level(snapshot, size, difficulty)
+            cached = self.cache.lookup(solver.model)
+            if cached: return self._finish(job, self._verdict(cached), cached)
+            search = solver.search()
+        except Exception as e:
+            print(f"[Error] Solvability check failed: {e}")
+            return self._finish(job, Solvability.UNKNOWN, None)
+        while not cancel.is_set():
+            result = search.run(self.slice_states)
+            if search.finished:
+                self.cache.store(solver.model, result)
+                return self._finish(job, self._verdict(result), result)
+            if search.expanded >= self.max_states:
+                return self._finish(job, Solvability.UNKNOWN, result)
+
+    @staticmethod
+    def _verdict(result):
+        return Solvability.SOLVABLE if result.solved else Solvability.UNSOLVABLE
+
+    def _finish(self, job, state, result):
+        with self._lock:
+            if job != self._job: return
+            self.state = state
+            self.result = result
@@ -0,0 +1,166 @@
+import atexit
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from api.io.Lightning.solver.LevelModel import ACTIONS
+from api.io.Lightning.solver.LevelSolver import SolveResult, SolveStatus
+from api.io.Lightning.utils.ConfigFile import PROJECT_PATH
+
+CACHE_PATH = os.path.join(PROJECT_PATH, "data", "solver_cache.db")
+# Bump whenever the turn rules or the key layout change, old entries are dropped
+CACHE_VERSION = 3
+# Entries kept in memory / on disk (oldest are evicted first)
+CACHE_SIZE = 4096
+DISK_LIMIT = 50000
+# New entries buffered before they are committed to the disk store
+FLUSH_EVERY = 32
+
+
+def level_hash(model):
+    """
+    Content hash of a level's static layout: board size, enemy mode, wall
+    and gate masks, exit, key and traps. Two levels that play the same hash
+    the same, whatever order or merging their wall lists used.
+    """
+    h = hashlib.sha1()
+    h.update(f"{model.size}|{'hard' if model.table.hard else 'classic'}|{model.win_cell}|{model.key_cell}|".encode())
+    h.update(bytes(model.grid.masks))
+    h.update(bytes(model.grid.closed_masks))
+    h.update(bytes(model.traps))
+    return h.hexdigest()
+
+
+def cache_key(model):
+    """Level hash plus the dynamic state (player, gate, relevant enemies) of the model's start."""
+    return f"{level_hash(model)}:{','.join(model.slot_types)}:{model.start:x}"
+
+
+class SolveCache:
+    """
+    Proven solver verdicts (solved with moves and length, or unsolvable),
+    keyed by `cache_key`. The most recent CACHE_SIZE entries live in an LRU
+    in memory; behind it is an sqlite file under data/ holding up to
+    DISK_LIMIT entries, so campaign levels and saved games keep their answers
+    across runs without the whole store being loaded. New entries are
+    committed in batches of FLUSH_EVERY and at exit. Budget-exhausted results
+    are never stored. With path=None the cache stays in memory (worker jobs,
+    which would otherwise all contend for the one sqlite file).
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path=CACHE_PATH, capacity=CACHE_SIZE, disk_limit=DISK_LIMIT):
+        self.path = path
+        self.capacity = capacity
+        self.disk_limit = disk_limit
+        self._lock = threading.RLock()
+        self._lru = OrderedDict()
+        self._db = None
+        self._pending = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def shared():
+        """Process-wide cache on the default path, flushed when the game exits."""
+        with SolveCache._shared_lock:
+            if SolveCache._shared is None:
+                SolveCache._shared = SolveCache()
+                atexit.register(SolveCache._shared.close)
+            return SolveCache._shared
+
+    def lookup(self, model):
+        """Cached SolveResult for the model's start state, None on a miss."""
+        entry = self.get(cache_key(model))
+        if entry is None: return None
+        status, length, moves = entry
+        moves = [ACTIONS[int(a)] for a in moves] if moves is not None else None
+        return SolveResult(SolveStatus(status), moves, length).tag('cache')
+
+    def store(self, model, result):
+        if not result or not result.proven: return
+        # Beam solutions are valid but not shortest, only optimal lengths are cached
+        if result.solved and not result.optimal: return
+        moves = ''.join(str(ACTIONS.index(m)) for m in result.moves) if result.moves is not None else None
+        self.put(cache_key(model), (result.status.value, result.length, moves))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+            else:
+                db = self._open()
+                row = db.execute("SELECT status, length, moves FROM results WHERE key = ?", (key,)).fetchone() if db else None
+                if row is None:
+                    self.misses += 1
+                    return None
+                entry = tuple(row)
+                self._remember(key, entry)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            if self._lru.get(key) == entry: return
+            self._remember(key, entry)
+            db = self._open()
+            if not db: return
+            try:
+                db.execute("INSERT OR REPLACE INTO results (key, status, length, moves) VALUES (?, ?, ?, ?)", (key,) + entry)
+                self._pending += 1
+                if self._pending >= FLUSH_EVERY: self.flush()
+            except sqlite3.Error as e:
+                print(f"[Error] Could not save solver cache: {e}")
+
+    def flush(self):
+        with self._lock:
+            if not self._pending or not self._db: return
+            try:
+                # Oldest rows go first once the store is over its limit
+                self._db.execute("DELETE FROM results WHERE rowid <= (SELECT MAX(rowid) FROM results) - ?", (self.disk_limit,))
+                self._db.commit()
+                self._pending = 0
+            except sqlite3.Error as e:
+                print(f"[Error] Could not save solver cache: {e}")
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            if self._db: self._db.close()
+            self._db = None
+
+    def __len__(self):
+        with self._lock:
+            db = self._open()
+            return db.execute("SELECT COUNT(*) FROM results").fetchone()[0] if db else len(self._lru)
+
+    def _remember(self, key, entry):
+        self._lru[key] = entry
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.capacity: self._lru.popitem(last=False)
+
+    def _open(self):
+        """The disk store, opened on first use; None (memory only) if it cannot be opened or `path` is None."""
+        if self._db is None and not self.path: self._db = False
+        if self._db is None:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                db = sqlite3.connect(self.path, check_same_thread=False)
+                db.execute("CREATE TABLE IF NOT EXISTS meta (version INTEGER)")
+                version = db.execute("SELECT version FROM meta").fetchone()
+                if version is None or version[0] != CACHE_VERSION:
+                    # Stale store from older rules: start over
+                    db.execute("DROP TABLE IF EXISTS results")
+                    db.execute("DELETE FROM meta")
+                    db.execute("INSERT INTO meta (version) VALUES (?)", (CACHE_VERSION,))
+                db.execute("CREATE TABLE IF NOT EXISTS results "
+                           "(key TEXT PRIMARY KEY, status TEXT, length INTEGER, moves TEXT)")
+                db.commit()
+                self._db = db
+            except (OSError, sqlite3.Error) as e:
+                print(f"[Error] Could not open solver cache: {e}")
+                self._db = False
+        return self._db
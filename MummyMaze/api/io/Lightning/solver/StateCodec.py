@@ -0,0 +1,104 @@
+from array import array
+
+# Enemy slots are grouped in the same order the game moves them in
+TYPE_ORDER = {'scorpion': 0, 'red_scorpion': 1, 'white_mummy': 2, 'red_mummy': 3}
+
+# Dense bitmap for visited states up to this many keys (4 MB), hash set above it
+BITMAP_LIMIT = 1 << 25
+
+
+class StateCodec:
+    """
+    Packs a solver state into a single int, low bits first:
+    player cell | gate bit | enemy cell of slot 0 | slot 1 | ...
+
+    Cells are row-major indexes (y * size + x); `dead` (== size * size) marks an
+    empty enemy slot. Enemies of the same type are interchangeable, so their
+    cells are sorted inside each type group and permutations share one key.
+    """
+    def __init__(self, size, enemy_types):
+        self.size = size
+        self.cells = size * size
+        self.dead = self.cells
+        self.bits = self.cells.bit_length()
+        self.cell_mask = (1 << self.bits) - 1
+        # slot -> level enemy index, stable inside a type
+        self.order = sorted(range(len(enemy_types)), key=lambda i: TYPE_ORDER.get(enemy_types[i], 99))
+        self.slot_types = [enemy_types[i] for i in self.order]
+        self.groups = []
+        start = 0
+        for i in range(1, len(self.slot_types) + 1):
+            if i == len(self.slot_types) or self.slot_types[i] != self.slot_types[start]:
+                if i - start > 1: self.groups.append((start, i))
+                start = i
+        self.enemy_shift = self.bits + 1
+        self.total_bits = self.enemy_shift + self.bits * len(self.slot_types)
+
+    def cell(self, x, y):
+        return y * self.size + x
+
+    def xy(self, cell):
+        return cell % self.size, cell // self.size
+
+    def slots_from_level(self, enemies):
+        """Level enemy dicts -> enemy cells in slot order."""
+        return [self.cell(int(enemies[i]['x']), int(enemies[i]['y'])) for i in self.order]
+
+    def canonical(self, ecells):
+        if not self.groups: return ecells
+        ecells = list(ecells)
+        for a, b in self.groups:
+            ecells[a:b] = sorted(ecells[a:b])
+        return ecells
+
+    def encode(self, pcell, gate_open, ecells):
+        key = pcell | (1 << self.bits if gate_open else 0)
+        shift = self.enemy_shift
+        for c in self.canonical(ecells):
+            key |= c << shift
+            shift += self.bits
+        return key
+
+    def decode(self, key):
+        """-> (player cell, gate open, tuple of enemy cells in slot order)"""
+        bits, mask = self.bits, self.cell_mask
+        ecells = []
+        k = key >> self.enemy_shift
+        for _ in self.slot_types:
+            ecells.append(k & mask)
+            k >>= bits
+        return key & mask, bool(key >> bits & 1), tuple(ecells)
+
+    def new_frontier(self):
+        """Flat buffer for one BFS layer of keys."""
+        return array('Q') if self.total_bits <= 64 else []
+
+    def new_visited(self):
+        return VisitedSet(self.total_bits)
+
+
+class VisitedSet:
+    """Set of state keys: a bytearray bitmap for small key spaces, a hash set otherwise."""
+    def __init__(self, key_bits):
+        self.count = 0
+        self.bitmap = bytearray((1 << key_bits) + 7 >> 3) if (1 << key_bits) <= BITMAP_LIMIT else None
+        self.keys = set() if self.bitmap is None else None
+
+    def add(self, key):
+        """Adds `key`, returns True if it was not there yet."""
+        if self.bitmap is not None:
+            byte, bit = key >> 3, 1 << (key & 7)
+            if self.bitmap[byte] & bit: return False
+            self.bitmap[byte] |= bit
+        else:
+            if key in self.keys: return False
+            self.keys.add(key)
+        self.count += 1
+        return True
+
+    def __contains__(self, key):
+        if self.bitmap is not None: return bool(self.bitmap[key >> 3] & (1 << (key & 7)))
+        return key in self.keys
+
+    def __len__(self):
+        return self.count
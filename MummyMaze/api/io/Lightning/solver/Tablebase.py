@@ -0,0 +1,104 @@
+from array import array
+from collections import deque
+from api.io.Lightning.solver.LevelModel import ACTIONS
+
+LOST = 0xFF
+# Levels with more reachable states than this are left to the regular search
+MAX_TABLE_STATES = 200000
+
+
+class Tablebase:
+    """
+    Exact distance-to-win for every state reachable from a level's start.
+
+    Built in two passes: a forward BFS from the start gives every reachable
+    state a dense index and records the move graph, then a backward BFS from
+    the winning states over the reversed graph fills a bytearray of distances
+    (LOST when the state can no longer be won). Lookups and best-move hints
+    are then constant time.
+    """
+    def __init__(self, model, keys, dist, index=None):
+        self.model = model
+        self.keys = keys
+        self.dist = dist
+        self.index = index if index is not None else {k: i for i, k in enumerate(keys)}
+
+    @staticmethod
+    def build(model, max_states=MAX_TABLE_STATES, cancel=None):
+        """
+        Returns None if the level is invalid, has more than `max_states`
+        reachable states, or `cancel` (a threading.Event) gets set meanwhile.
+        """
+        if not model.valid: return None
+        keys = array('Q') if model.codec.total_bits <= 64 else []
+        index = {model.start: 0}
+        keys.append(model.start)
+        offsets = array('I', [0])
+        targets = array('I')
+        i = 0
+        while i < len(keys):
+            key = keys[i]
+            if cancel and not i & 1023 and cancel.is_set(): return None
+            # The game ends on the win cell, nothing is expanded past it
+            if not model.is_win(key):
+                # Dead ends stay in: the UI looks them up to show LOST at once
+                for _, nxt in model.successors(key, dead_ends=False):
+                    j = index.get(nxt)
+                    if j is None:
+                        if len(keys) >= max_states: return None
+                        j = index[nxt] = len(keys)
+                        keys.append(nxt)
+                    targets.append(j)
+            offsets.append(len(targets))
+            i += 1
+
+        if cancel and cancel.is_set(): return None
+        n = len(keys)
+        # Reverse the edge list (CSR) so the backward pass can walk predecessors
+        rev_offsets = array('I', bytes(4 * (n + 1)))
+        for t in targets: rev_offsets[t + 1] += 1
+        for v in range(n): rev_offsets[v + 1] += rev_offsets[v]
+        fill = array('I', rev_offsets)
+        sources = array('I', bytes(4 * len(targets)))
+        for v in range(n):
+            for e in range(offsets[v], offsets[v + 1]):
+                t = targets[e]
+                sources[fill[t]] = v
+                fill[t] += 1
+
+        dist = bytearray([LOST]) * n
+        q = deque()
+        for v in range(n):
+            if model.is_win(keys[v]):
+                dist[v] = 0
+                q.append(v)
+        while q:
+            v = q.popleft()
+            d = min(dist[v] + 1, LOST - 1)
+            for e in range(rev_offsets[v], rev_offsets[v + 1]):
+                u = sources[e]
+                if dist[u] == LOST and not model.is_win(keys[u]):
+                    dist[u] = d
+                    q.append(u)
+
+        return Tablebase(model, keys, dist, index)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def key_for(self, snapshot):
+        """State key of a level snapshot, None if its enemy set does not fit this table."""
+        return self.model.key_for(snapshot)
+
+    def distance(self, key):
+        """Moves to win from `key`, LOST if it cannot be won, None if the state is not in the table."""
+        i = self.index.get(key)
+        return None if i is None else self.dist[i]
+
+    def best_move(self, key):
+        """(dx, dy) of a move that keeps the shortest win, None if there is none."""
+        d = self.distance(key)
+        if d is None or d == LOST or d == 0: return None
+        for action, nxt in self.model.successors(key):
+            if self.distance(nxt) == d - 1: return ACTIONS[action]
+        return None
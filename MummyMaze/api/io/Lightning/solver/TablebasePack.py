@@ -0,0 +1,125 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from api.io.Lightning.solver.LevelModel import LevelModel
+from api.io.Lightning.solver.Tablebase import Tablebase, LOST
+
+MAGIC = b'MMTB'
+# Bump whenever the turn rules or the key layout change, old packs are rebuilt
+PACK_VERSION = 4
+# magic, version, maze size, sha256 of the level json, state count, hash slots
+HEADER = struct.Struct('<4sHH32sII')
+HEADER_SIZE = 48
+EMPTY = 0xFFFFFFFFFFFFFFFF
+HASH_MUL = 0x9E3779B97F4A7C15
+
+
+def pack_path(level_path):
+    return os.path.splitext(level_path)[0] + '.tb'
+
+
+def level_checksum(level_path):
+    with open(level_path, 'rb') as f: return hashlib.sha256(f.read()).digest()
+
+
+def load_level_model(level_path):
+    with open(level_path, 'r') as f: data = json.load(f)
+    return LevelModel(data, int(data.get('mazeType', 8)), data.get('difficulty') or 'medium')
+
+
+class PackedTablebase(Tablebase):
+    """
+    Tablebase read straight from a memory-mapped `.tb` sidecar.
+
+    File layout (little endian): a 48-byte header, then an open-addressing
+    hash table of `slots` uint64 state keys (EMPTY for a free slot), then one
+    distance byte per slot. A lookup hashes the key and probes linearly, so it
+    touches a couple of pages of the map and never loads the whole file.
+    """
+    def __init__(self, model, mm, n_states, slots):
+        self.model = model
+        self.mm = mm
+        self.n_states = n_states
+        self.slots = slots
+        self.mask = slots - 1
+        self.shift = 64 - (slots.bit_length() - 1)
+        self.keys = memoryview(mm)[HEADER_SIZE:HEADER_SIZE + 8 * slots].cast('Q')
+        self.dist = memoryview(mm)[HEADER_SIZE + 8 * slots:HEADER_SIZE + 9 * slots]
+
+    def __len__(self):
+        return self.n_states
+
+    def distance(self, key):
+        keys, mask = self.keys, self.mask
+        i = ((key * HASH_MUL) & EMPTY) >> self.shift
+        while True:
+            k = keys[i]
+            if k == key: return self.dist[i]
+            if k == EMPTY: return None
+            i = (i + 1) & mask
+
+    @staticmethod
+    def write(tablebase, path, checksum):
+        """Writes `tablebase` as a pack; returns False if its keys do not fit in 64 bits."""
+        # Keys are read back through a native uint64 view of the map
+        if tablebase.model.codec.total_bits > 64 or sys.byteorder != 'little': return False
+        n = len(tablebase.keys)
+        slots = 1 << max(4, (2 * n - 1).bit_length())
+        shift = 64 - (slots.bit_length() - 1)
+        keys = array('Q', [EMPTY]) * slots
+        dist = bytearray([LOST]) * slots
+        for k, d in zip(tablebase.keys, tablebase.dist):
+            i = ((k * HASH_MUL) & EMPTY) >> shift
+            while keys[i] != EMPTY: i = (i + 1) & (slots - 1)
+            keys[i] = k
+            dist[i] = d
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, PACK_VERSION, tablebase.model.size, checksum, n, slots).ljust(HEADER_SIZE, b'\0'))
+            f.write(keys.tobytes())
+            f.write(bytes(dist))
+        os.replace(tmp, path)
+        return True
+
+    @staticmethod
+    def open_pack(level_path, model=None):
+        """Maps the pack of `level_path`; None if it is missing, corrupt or stale."""
+        path = pack_path(level_path)
+        if not os.path.exists(path) or sys.byteorder != 'little': return None
+        try:
+            with open(path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, size, checksum, n_states, slots = HEADER.unpack_from(mm, 0)
+            if magic != MAGIC or version != PACK_VERSION or checksum != level_checksum(level_path) \
+                    or len(mm) != HEADER_SIZE + 9 * slots:
+                mm.close()
+                return None
+            return PackedTablebase(model or load_level_model(level_path), mm, n_states, slots)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"[Error] Could not open tablebase pack {path}: {e}")
+            return None
+
+    @staticmethod
+    def build_pack(level_path, model=None, cancel=None):
+        """Builds and writes the pack for `level_path`; returns the in-memory Tablebase (or None, also when cancelled)."""
+        model = model or load_level_model(level_path)
+        tb = Tablebase.build(model, cancel=cancel)
+        if tb is None: return None
+        try:
+            PackedTablebase.write(tb, pack_path(level_path), level_checksum(level_path))
+        except OSError as e:
+            print(f"[Error] Could not write tablebase pack: {e}")
+        return tb
+
+    @staticmethod
+    def load_or_build(level_path, model=None, cancel=None):
+        """Mapped pack if it is up to date, otherwise rebuild it (falls back to the in-memory table)."""
+        tb = PackedTablebase.open_pack(level_path, model)
+        if tb: return tb
+        print(f"[System] Building tablebase pack for {os.path.basename(level_path)}...")
+        built = PackedTablebase.build_pack(level_path, model, cancel)
+        return PackedTablebase.open_pack(level_path, model) or built
@@ -0,0 +1,215 @@
+import time
+from api.io.Lightning.entities.EnemyMoveTable import TYPE_INDEX, STRENGTH
+from api.io.Lightning.solver.LevelSolver import SolveResult, SolveStatus
+from api.io.Lightning.solver.StateCodec import BITMAP_LIMIT
+from api.io.Lightning.utils.Pathfinder import FlowFields
+from api.io.Lightning.utils.WallGrid import BLOCK_UP, BLOCK_DOWN, BLOCK_LEFT, BLOCK_RIGHT
+
+# numpy is optional, callers check VectorSolver.available() and use LevelSolver otherwise
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# A layer costs about as much as a few serial expansions, so BFS can afford
+# a much larger budget than the A* search it stands in for
+VECTOR_STATE_BUDGET = 100000
+# Below this many cells the layers stay tiny and A* finishes first
+VECTOR_MIN_CELLS = 100
+
+
+def fill_move_table(table, etypes):
+    """
+    Fills every EnemyMoveTable entry of `etypes` with array ops on the wall
+    masks instead of one greedy step at a time. Hard-mode red scorpions
+    copy one flow field per player cell into their column of the table.
+    """
+    cells, size = table.cells, table.size
+    dest = np.frombuffer(table.dest, dtype=np.uint16)
+    first = np.frombuffer(table.first, dtype=np.uint16)
+    e, p = np.divmod(np.arange(cells * cells, dtype=np.int64), cells)
+    block = cells * cells * 2
+    for etype in set(etypes):
+        t = TYPE_INDEX.get(etype, 0)
+        if table.hard and etype == 'red_scorpion':
+            fields = FlowFields.for_grid(table.grid)
+            for pcell in range(cells):
+                for gate_open in (0, 1):
+                    flow = np.frombuffer(fields.get(pcell, bool(gate_open))[1], dtype=np.uint16)
+                    first[t * block + pcell * 2 + gate_open:(t + 1) * block:cells * 2] = flow
+                    dest[t * block + pcell * 2 + gate_open:(t + 1) * block:cells * 2] = flow
+            continue
+        horizontal = etype != 'red_mummy'
+        for gate_open in (0, 1):
+            masks = np.frombuffer(table.grid.get_masks(bool(gate_open)), dtype=np.uint8)
+            step = _greedy_step(e, p, masks, size, horizontal)
+            end = _greedy_step(step, p, masks, size, horizontal) if 'mummy' in etype else step
+            first[t * block + gate_open:(t + 1) * block:2] = step
+            dest[t * block + gate_open:(t + 1) * block:2] = end
+    return table
+
+
+def _greedy_step(e, p, masks, size, horizontal):
+    """Vectorized EnemyMoveTable._greedy_step for arrays of enemy / player cells."""
+    dx = np.sign(p % size - e % size)
+    dy = np.sign(p // size - e // size)
+    m = masks[e]
+    can_h = (dx != 0) & ((m & np.where(dx > 0, BLOCK_RIGHT, BLOCK_LEFT)) == 0)
+    can_v = (dy != 0) & ((m & np.where(dy > 0, BLOCK_DOWN, BLOCK_UP)) == 0)
+    if horizontal: return np.where(can_h, e + dx, np.where(can_v, e + dy * size, e))
+    return np.where(can_v, e + dy * size, np.where(can_h, e + dx, e))
+
+
+class VectorSolver:
+    """
+    Layered BFS over a LevelModel that expands a whole layer per step.
+
+    The frontier is a uint64 array of packed keys. Each layer is decoded into
+    player / gate / enemy columns, the five actions are applied as array ops on
+    the wall masks, enemy replies are gathered from the fully filled move
+    table slot by slot (fights, captures and key toggles become masks), and
+    the children are deduplicated with np.unique. It gives the same
+    verdicts and lengths as LevelSolver.bfs.
+    """
+    def __init__(self, model):
+        self.model = model
+        codec = model.codec
+        table = model.table
+        # Finish the shared table once, the serial solver reads the same entries
+        fill_move_table(table, model.slot_types)
+        self.first = np.frombuffer(table.first, dtype=np.uint16).astype(np.int64)
+        self.dest = np.frombuffer(table.dest, dtype=np.uint16).astype(np.int64)
+        self.open_masks = np.frombuffer(model.grid.get_masks(True), dtype=np.uint8)
+        self.closed_masks = np.frombuffer(model.grid.get_masks(False), dtype=np.uint8)
+        self.traps = np.frombuffer(model.traps, dtype=np.uint8).astype(bool)
+        self.type_rows = [TYPE_INDEX.get(t, 0) * codec.cells for t in model.slot_types]
+        self.strength = [STRENGTH.get(t, 0) for t in model.slot_types]
+
+    @staticmethod
+    def available():
+        return np is not None
+
+    @staticmethod
+    def supports(model):
+        return np is not None and model.codec.total_bits <= 64
+
+    @staticmethod
+    def preferred(model):
+        """True when the layer engine is expected to beat the serial A* on this level."""
+        return VectorSolver.supports(model) and model.cells >= VECTOR_MIN_CELLS
+
+    def bfs(self, max_states=VECTOR_STATE_BUDGET):
+        started = time.perf_counter()
+        result = self._bfs(max_states)
+        result.seconds = time.perf_counter() - started
+        return result.tag('vector', prunes=self.model.prunes, max_states=max_states)
+
+    def _bfs(self, max_states):
+        model, codec = self.model, self.model.codec
+        if not model.valid: return SolveResult(SolveStatus.UNSOLVABLE)
+        mask = np.uint64(codec.cell_mask)
+        # One bit per key, like VisitedSet, so BITMAP_LIMIT keys stay 4 MB
+        bitmap = np.zeros((1 << codec.total_bits) + 7 >> 3, dtype=np.uint8) \
+            if (1 << codec.total_bits) <= BITMAP_LIMIT else None
+        seen = np.array([model.start], dtype=np.uint64)
+        if bitmap is not None: bitmap[model.start >> 3] |= 1 << (model.start & 7)
+        layer = seen
+        depth = expanded = peak = 0
+        stored = 1
+
+        def done(status, length=None):
+            return SolveResult(status, length=length, expanded=expanded).sized(peak, stored)
+
+        while len(layer):
+            peak = max(peak, len(layer))
+            if np.any(layer & mask == model.win_cell): return done(SolveStatus.SOLVED, depth)
+            expanded += len(layer)
+            if expanded > max_states: return done(SolveStatus.BUDGET_EXHAUSTED)
+            children = np.unique(self.expand(layer))
+            if bitmap is not None:
+                byte, bit = children >> np.uint64(3), np.left_shift(1, children & np.uint64(7)).astype(np.uint8)
+                new = (bitmap[byte] & bit) == 0
+                layer = children[new]
+                # Several new keys can share a byte, so the bits are OR-ed in unbuffered
+                np.bitwise_or.at(bitmap, byte[new], bit[new])
+            else:
+                # `seen` stays sorted: membership is a binary search, and merging
+                # two sorted runs with a stable sort is close to linear
+                pos = np.minimum(np.searchsorted(seen, children), len(seen) - 1)
+                layer = children[seen[pos] != children]
+                seen = np.sort(np.concatenate((seen, layer)), kind='stable')
+            stored += len(layer)
+            depth += 1
+        return done(SolveStatus.UNSOLVABLE)
+
+    def expand(self, layer):
+        """Packed keys of every surviving successor of the keys in `layer` (may repeat)."""
+        model, codec = self.model, self.model.codec
+        cells, bits = codec.cells, codec.bits
+        mask = np.uint64(codec.cell_mask)
+        p = (layer & mask).astype(np.int64)
+        g = ((layer >> np.uint64(bits)) & np.uint64(1)).astype(bool)
+        ecells = [((layer >> np.uint64(codec.enemy_shift + i * bits)) & mask).astype(np.int64)
+                  for i in range(len(model.slot_types))]
+        if model.has_gate:
+            m = np.where(g, self.open_masks[p], self.closed_masks[p])
+        else:
+            m = self.open_masks[p]
+
+        out = []
+        for a, (delta, bit) in enumerate(model.moves):
+            ok = (m & bit) == 0 if bit else np.ones(len(p), dtype=bool)
+            n = np.where(ok, p + delta, p)
+            ok &= ~self.traps[n]
+            for e in ecells: ok &= e != n
+            if not ok.any(): continue
+            n, gate = n[ok], g[ok].copy()
+            if a and model.switch_cell >= 0: gate ^= n == model.switch_cell
+            es = [e[ok] for e in ecells]
+            alive = np.ones(len(n), dtype=bool)
+            # Enemies take their turns one slot at a time, as in LevelModel._turn
+            standing = n != model.win_cell
+            for i, row in enumerate(self.type_rows):
+                e = es[i]
+                moving = standing & (e != codec.dead)
+                idx = ((row + np.where(moving, e, 0)) * cells + n) * 2 + gate
+                first, dest = self.first[idx], self.dest[idx]
+                moving = self._advance(es, i, first, moving & (first != e), n, gate, alive)
+                self._advance(es, i, dest, moving & (dest != first), n, gate, alive)
+            if not alive.any(): continue
+            out.append(self._encode(n[alive], gate[alive], [e[alive] for e in es]))
+        if not out: return np.empty(0, dtype=np.uint64)
+        return np.concatenate(out)
+
+    def _advance(self, es, i, c, moving, n, gate, alive):
+        """
+        Moves slot `i` onto `c` where `moving`, updating the gate and player
+        survival in place; -> rows where the mover is still standing.
+        """
+        model, dead = self.model, self.model.codec.dead
+        es[i] = np.where(moving, c, es[i])
+        if model.switch_cell >= 0: gate ^= moving & (c == model.switch_cell)
+        alive &= ~(moving & (c == n))
+        for j in range(len(es)):
+            if j == i: continue
+            hit = moving & (es[j] == c)
+            if self.strength[i] >= self.strength[j]:
+                es[j] = np.where(hit, dead, es[j])
+            else:
+                es[i] = np.where(hit, dead, es[i])
+                moving = moving & ~hit
+        return moving
+
+    def _encode(self, p, gate_open, ecells):
+        codec = self.model.codec
+        if codec.groups:
+            cols = np.stack(ecells, axis=1)
+            for a, b in codec.groups:
+                cols[:, a:b] = np.sort(cols[:, a:b], axis=1)
+            ecells = [cols[:, i] for i in range(cols.shape[1])]
+        key = p.astype(np.uint64) | (gate_open.astype(np.uint64) << np.uint64(codec.bits))
+        shift = codec.enemy_shift
+        for c in ecells:
+            key |= c.astype(np.uint64) << np.uint64(shift)
+            shift += codec.bits
+        return key
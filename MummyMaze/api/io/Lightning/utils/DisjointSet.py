@@ -0,0 +1,44 @@
+from array import array
+from api.io.Lightning.utils.WallGrid import BLOCK_DOWN, BLOCK_RIGHT
+
+
+class DisjointSet:
+    """
+    Union-find over board cells (index y * size + x) with path halving and
+    union by size. `components` is kept up to date, so asking whether the
+    board is still in one piece after opening an edge costs two finds.
+    """
+    def __init__(self, n):
+        self.parent = array('i', range(n))
+        self.count = array('i', [1]) * n
+        self.components = n
+
+    @staticmethod
+    def of_grid(grid):
+        """Cells of a WallGrid joined along every open edge (gate open)."""
+        size = grid.size
+        ds = DisjointSet(size * size)
+        for c, m in enumerate(grid.masks):
+            if not m & BLOCK_RIGHT: ds.union(c, c + 1)
+            if not m & BLOCK_DOWN: ds.union(c, c + size)
+        return ds
+
+    def find(self, a):
+        parent = self.parent
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    def union(self, a, b):
+        """Joins the sets of `a` and `b`; False if they were already one."""
+        a, b = self.find(a), self.find(b)
+        if a == b: return False
+        if self.count[a] < self.count[b]: a, b = b, a
+        self.parent[b] = a
+        self.count[a] += self.count[b]
+        self.components -= 1
+        return True
+
+    def connected(self, a, b):
+        return self.find(a) == self.find(b)
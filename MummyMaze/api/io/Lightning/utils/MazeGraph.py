@@ -0,0 +1,222 @@
+import heapq
+from array import array
+from api.io.Lightning.utils.WallGrid import BLOCK_UP, BLOCK_DOWN, BLOCK_LEFT, BLOCK_RIGHT
+
+UNREACHED = 0xFFFF
+INF = float('inf')
+
+
+class MazeGraph:
+    """
+    Wall graph of one maze with its corridors contracted.
+
+    Junctions, dead ends and isolated cells (anything without exactly two open
+    sides) become nodes; every run of two-sided cells between two nodes is
+    folded into one weighted edge, a corridor. Corridor cells remember which
+    corridor they lie on and how far along it they are, so distance and path
+    queries between any two cells run Dijkstra over the nodes only.
+
+    Dead-end pockets are the tree-shaped parts of the maze that hang off its
+    loops: `mouth[c]` is the loop cell a pocket cell must pass through to get
+    out, -1 for cells on the loops (or on a component without any loop).
+
+    `blocked` cells (traps) are left out of the graph entirely.
+    """
+    def __init__(self, grid, gate_open=True, blocked=None):
+        size = grid.size
+        self.size = size
+        self.cells = cells = size * size
+        masks = grid.get_masks(gate_open)
+        moves = ((-size, BLOCK_UP), (size, BLOCK_DOWN), (-1, BLOCK_LEFT), (1, BLOCK_RIGHT))
+        adj = [[] for _ in range(cells)]
+        for c in range(cells):
+            if blocked and blocked[c]: continue
+            for delta, bit in moves:
+                if not masks[c] & bit and not (blocked and blocked[c + delta]): adj[c].append(c + delta)
+        self.adj = adj
+
+        self.nodes = []
+        self.node_id = array('i', [-1]) * cells
+        self.edges = []
+        # (end a, end b, length, cells from a to b) per corridor; a direct
+        # node-to-node step is a corridor without cells
+        self.corridors = []
+        self.corridor_of = array('i', [-1]) * cells
+        self.offset = array('H', bytes(2 * cells))
+        self._direct = {}
+
+        for c in range(cells):
+            if len(adj[c]) != 2 and not (blocked and blocked[c]): self._add_node(c)
+        for u in list(self.nodes): self._walk_from(u)
+        # Pure loops have no junction at all, any of their cells will do
+        for c in range(cells):
+            if len(adj[c]) == 2 and self.node_id[c] < 0 and self.corridor_of[c] < 0:
+                self._add_node(c)
+                self._walk_from(c)
+        self.mouth = self._pockets()
+
+    @staticmethod
+    def for_grid(grid, gate_open=True):
+        """One shared graph per grid and gate state (stored next to its move tables)."""
+        key = ('graph', bool(gate_open))
+        if key not in grid.move_tables: grid.move_tables[key] = MazeGraph(grid, gate_open)
+        return grid.move_tables[key]
+
+    def _add_node(self, c):
+        self.node_id[c] = len(self.nodes)
+        self.nodes.append(c)
+        self.edges.append([])
+
+    def _walk_from(self, u):
+        adj, node_id = self.adj, self.node_id
+        for first in adj[u]:
+            prev, cur, run = u, first, []
+            while node_id[cur] < 0:
+                run.append(cur)
+                a, b = adj[cur]
+                prev, cur = cur, (b if a == prev else a)
+            if run:
+                cid = self.corridor_of[run[0]]
+                if cid < 0: cid = self._add_corridor(u, cur, run)
+            else:
+                pair = (min(u, cur), max(u, cur))
+                cid = self._direct.get(pair)
+                if cid is None: cid = self._direct[pair] = self._add_corridor(u, cur, run)
+            self.edges[node_id[u]].append((node_id[cur], len(run) + 1, cid))
+
+    def _add_corridor(self, a, b, run):
+        cid = len(self.corridors)
+        self.corridors.append((a, b, len(run) + 1, run))
+        for i, c in enumerate(run, 1):
+            self.corridor_of[c] = cid
+            self.offset[c] = i
+        return cid
+
+    def _pockets(self):
+        """Peels dead ends off until only loops are left, then maps every peeled cell to its loop cell."""
+        adj = self.adj
+        degree = [len(n) for n in adj]
+        peeled = bytearray(self.cells)
+        stack = [c for c in range(self.cells) if degree[c] == 1]
+        while stack:
+            c = stack.pop()
+            if peeled[c]: continue
+            peeled[c] = 1
+            for n in adj[c]:
+                if peeled[n]: continue
+                degree[n] -= 1
+                if degree[n] == 1: stack.append(n)
+        mouth = array('i', [-1]) * self.cells
+        for root in range(self.cells):
+            if peeled[root] or not adj[root]: continue
+            stack = [n for n in adj[root] if peeled[n] and mouth[n] < 0]
+            while stack:
+                c = stack.pop()
+                mouth[c] = root
+                stack.extend(n for n in adj[c] if peeled[n] and mouth[n] < 0)
+        return mouth
+
+    def in_pocket(self, cell):
+        return self.mouth[cell] >= 0
+
+    def _ends(self, cell):
+        """(node index, distance, corridor, cell offset, node offset) for the nodes a cell reaches first."""
+        if self.node_id[cell] >= 0: return [(self.node_id[cell], 0, -1, 0, 0)]
+        cid = self.corridor_of[cell]
+        if cid < 0: return []
+        a, b, length, _ = self.corridors[cid]
+        off = self.offset[cell]
+        return [(self.node_id[a], off, cid, off, 0), (self.node_id[b], length - off, cid, off, length)]
+
+    def _dijkstra(self, seeds):
+        dist = [INF] * len(self.nodes)
+        prev = [None] * len(self.nodes)
+        heap = []
+        for n, d, *leg in seeds:
+            if d < dist[n]:
+                dist[n], prev[n] = d, ('seed', leg)
+                heapq.heappush(heap, (d, n))
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]: continue
+            for v, w, cid in self.edges[u]:
+                if d + w < dist[v]:
+                    dist[v], prev[v] = d + w, (u, cid)
+                    heapq.heappush(heap, (d + w, v))
+        return dist, prev
+
+    def distances_from(self, source):
+        """Shortest distance from `source` to every cell (array('H'), UNREACHED if cut off)."""
+        out = array('H', [UNREACHED]) * self.cells
+        ends = self._ends(source)
+        if not ends:
+            out[source] = 0
+            return out
+        dist, _ = self._dijkstra(ends)
+        for i, c in enumerate(self.nodes):
+            if dist[i] < INF: out[c] = min(dist[i], UNREACHED - 1)
+        for a, b, length, run in self.corridors:
+            da, db = dist[self.node_id[a]], dist[self.node_id[b]]
+            if da == INF and db == INF: continue
+            for i, c in enumerate(run, 1): out[c] = min(da + i, db + length - i, UNREACHED - 1)
+        cid = self.corridor_of[source]
+        if cid >= 0:
+            # Along the source's own corridor the direct walk may beat going round
+            off = self.offset[source]
+            for i, c in enumerate(self.corridors[cid][3], 1): out[c] = min(out[c], abs(i - off))
+        out[source] = 0
+        return out
+
+    def distance(self, start, goal):
+        """Shortest distance between two cells, -1 if `goal` cannot be reached."""
+        best = self._best(start, goal)
+        return best[0] if best else -1
+
+    def path(self, start, goal):
+        """Cells of a shortest path after `start` up to and including `goal`, [] if none."""
+        best = self._best(start, goal)
+        if not best or start == goal: return []
+        _, end, prev = best
+        if end[0] == 'direct': return self._leg(*end[1])
+        node, _, cid, off, node_off = end
+        legs = [self._leg(cid, node_off, off)] if cid >= 0 else []
+        while True:
+            step = prev[node]
+            if step[0] == 'seed':
+                cid, off, node_off = step[1]
+                if cid >= 0: legs.append(self._leg(cid, off, node_off))
+                break
+            u, cid = step
+            legs.append(self._leg(cid, self._node_offset(cid, self.nodes[u]), self._node_offset(cid, self.nodes[node])))
+            node = u
+        return [c for leg in reversed(legs) for c in leg]
+
+    def _best(self, start, goal):
+        """(distance, how the goal is entered, predecessor map) of the shortest route, None if there is none."""
+        if start == goal: return (0, None, None)
+        starts, goals = self._ends(start), self._ends(goal)
+        if not starts or not goals: return None
+        dist, prev = self._dijkstra(starts)
+        best = None
+        for end in goals:
+            d = dist[end[0]] + end[1]
+            if d < INF and (best is None or d < best[0]): best = (d, end, prev)
+        cid = self.corridor_of[start]
+        if cid >= 0 and cid == self.corridor_of[goal]:
+            d = abs(self.offset[start] - self.offset[goal])
+            if best is None or d < best[0]: best = (d, ('direct', (cid, self.offset[start], self.offset[goal])), None)
+        return best
+
+    def _node_offset(self, cid, cell):
+        return 0 if self.corridors[cid][0] == cell else self.corridors[cid][2]
+
+    def _leg(self, cid, src, dst):
+        """Cells of corridor `cid` after offset `src` up to offset `dst` (0 / length are its end nodes)."""
+        a, b, length, run = self.corridors[cid]
+        at = lambda k: a if k == 0 else b if k == length else run[k - 1]
+        step = 1 if dst > src else -1
+        return [at(k) for k in range(src + step, dst + step, step)]
+
+    def __repr__(self):
+        return (f"MazeGraph({self.size}x{self.size}, nodes={len(self.nodes)}, "
+                f"edges={len(self.corridors)}, pocket_cells={sum(1 for m in self.mouth if m >= 0)})")
@@ -1,4 +1,12 @@
 import heapq
+import threading
+from array import array
+from collections import OrderedDict
+from api.io.Lightning.utils.MazeGraph import MazeGraph, UNREACHED
+from api.io.Lightning.utils.WallGrid import BLOCK_UP, BLOCK_DOWN, BLOCK_LEFT, BLOCK_RIGHT
+
+# Fields kept per grid; 2 x 144 covers every (player cell, gate) pair up to 12x12
+FIELD_CACHE_SIZE = 288
 
 class Pathfinder:
     @staticmethod
@@ -49,4 +57,118 @@ class Pathfinder:
             path.append(list(curr))
             curr = came_from[curr]
         path.reverse()
-        return path
\ No newline at end of file
+        return path
+
+    @staticmethod
+    def graph_search(start, goal, grid, gate_open=True):
+        """
+        Same result as astar_search ([x, y] cells after `start` up to `goal`),
+        found on the grid's corridor-contracted MazeGraph instead of cell by cell.
+        """
+        size = grid.size
+        path = MazeGraph.for_grid(grid, gate_open).path(start[1] * size + start[0], goal[1] * size + goal[0])
+        return [[c % size, c // size] for c in path]
+
+    @staticmethod
+    def graph_distance(start, goal, grid, gate_open=True):
+        """Number of moves from `start` to `goal`, -1 if walls cut them apart."""
+        size = grid.size
+        return MazeGraph.for_grid(grid, gate_open).distance(start[1] * size + start[0], goal[1] * size + goal[0])
+
+    @staticmethod
+    def distance_field(grid, target, gate_open=True, out=None, queue=None):
+        """
+        BFS distance from every cell to `target` (array('H'), UNREACHED if
+        cut off). Walls block both ways, so this is also the distance from
+        `target` to every cell. `out` and `queue` are reused when given.
+        """
+        cells = grid.size * grid.size
+        dist = out if out is not None else array('H', [UNREACHED]) * cells
+        if out is not None:
+            for i in range(cells): dist[i] = UNREACHED
+        q = queue if queue is not None else array('H', bytes(2 * cells))
+        masks = grid.get_masks(gate_open)
+        moves = ((-grid.size, BLOCK_UP), (grid.size, BLOCK_DOWN), (-1, BLOCK_LEFT), (1, BLOCK_RIGHT))
+        dist[target] = 0
+        q[0] = target
+        head, tail = 0, 1
+        while head < tail:
+            c = q[head]
+            head += 1
+            d = dist[c] + 1
+            m = masks[c]
+            for delta, bit in moves:
+                if m & bit: continue
+                n = c + delta
+                if dist[n] == UNREACHED:
+                    dist[n] = d
+                    q[tail] = n
+                    tail += 1
+        return dist
+
+    @staticmethod
+    def flow_field(grid, target, dist, gate_open=True, out=None):
+        """
+        Next cell on a shortest path to `target` for every cell (array('H')),
+        the cell itself at the target or when cut off. Among equal steps the
+        horizontal one towards the target wins, then the vertical one, then
+        the rest, the same priority the greedy chasers use.
+        """
+        size, cells = grid.size, grid.size * grid.size
+        flow = out if out is not None else array('H', bytes(2 * cells))
+        masks = grid.get_masks(gate_open)
+        right, left, down, up = (1, BLOCK_RIGHT), (-1, BLOCK_LEFT), (size, BLOCK_DOWN), (-size, BLOCK_UP)
+        tx, ty = target % size, target // size
+        for c in range(cells):
+            flow[c] = c
+            d = dist[c]
+            if d == 0 or d == UNREACHED: continue
+            h, v = (right, left) if tx > c % size else (left, right), (down, up) if ty > c // size else (up, down)
+            m = masks[c]
+            for delta, bit in (h[0], v[0], h[1], v[1]):
+                if not m & bit and dist[c + delta] == d - 1:
+                    flow[c] = c + delta
+                    break
+        return flow
+
+
+class FlowFields:
+    """
+    Distance and flow fields of one WallGrid, cached per (target cell, gate
+    open). Every hard-mode red scorpion chases the player, so a single field
+    per player cell answers all of them. Fields are kept in an LRU of
+    `capacity` entries; evicted arrays are recycled as buffers.
+    """
+    def __init__(self, grid, capacity=FIELD_CACHE_SIZE):
+        self.grid = grid
+        self.capacity = capacity
+        self.cells = grid.size * grid.size
+        self._fields = OrderedDict()
+        self._queue = array('H', bytes(2 * self.cells))
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def for_grid(grid):
+        """One shared set of fields per grid (stored next to its move tables)."""
+        if 'flow' not in grid.move_tables: grid.move_tables['flow'] = FlowFields(grid)
+        return grid.move_tables['flow']
+
+    def get(self, target, gate_open=True):
+        """-> (distance field, flow field) towards `target`, valid until the entry is evicted."""
+        key = (target, bool(gate_open))
+        with self._lock:
+            fields = self._fields.get(key)
+            if fields is not None:
+                self._fields.move_to_end(key)
+                return fields
+            dist_buf = flow_buf = None
+            if len(self._fields) >= self.capacity: _, (dist_buf, flow_buf) = self._fields.popitem(last=False)
+            dist = Pathfinder.distance_field(self.grid, target, gate_open, dist_buf, self._queue)
+            fields = self._fields[key] = (dist, Pathfinder.flow_field(self.grid, target, dist, gate_open, flow_buf))
+            return fields
+
+    def distance(self, cell, target, gate_open=True):
+        return self.get(target, gate_open)[0][cell]
+
+    def next_step(self, cell, target, gate_open=True):
+        return self.get(target, gate_open)[1][cell]
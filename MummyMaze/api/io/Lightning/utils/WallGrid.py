@@ -0,0 +1,107 @@
+BLOCK_UP = 1
+BLOCK_DOWN = 2
+BLOCK_LEFT = 4
+BLOCK_RIGHT = 8
+
+# (dx, dy, blocked bit) for the 4 move directions
+DIRECTIONS = ((0, -1, BLOCK_UP), (0, 1, BLOCK_DOWN), (-1, 0, BLOCK_LEFT), (1, 0, BLOCK_RIGHT))
+
+
+class WallGrid:
+    """
+    Per-level wall index: one bitmask of blocked directions per cell, stored
+    row-major in a bytearray (index = y * size + x). Map borders are baked in,
+    the gate is kept as a separate edge that can be switched on or off.
+    """
+    def __init__(self, size, walls=(), gate=None):
+        self.size = size
+        self.masks = bytearray(size * size)
+        for x in range(size):
+            self.masks[x] |= BLOCK_UP
+            self.masks[(size - 1) * size + x] |= BLOCK_DOWN
+        for y in range(size):
+            self.masks[y * size] |= BLOCK_LEFT
+            self.masks[y * size + size - 1] |= BLOCK_RIGHT
+        self.gate = None
+        self.closed_masks = self.masks
+        self.move_tables = {}
+        for w in walls:
+            self.add_wall(int(w['x']), int(w['y']), w['dir'])
+        self.set_gate(gate)
+
+    @staticmethod
+    def of(walls, size):
+        """Return `walls` itself if it is already a WallGrid, otherwise index the wall list."""
+        if isinstance(walls, WallGrid): return walls
+        return WallGrid(size, walls or ())
+
+    def add_wall(self, x, y, direction):
+        size = self.size
+        # 'horizontal' sits on the TOP edge of (x, y), 'vertical' on the LEFT edge
+        if direction in ('horizontal', 'both') and 0 <= x < size:
+            if 0 <= y < size: self._block(y * size + x, BLOCK_UP)
+            if 0 <= y - 1 < size: self._block((y - 1) * size + x, BLOCK_DOWN)
+        if direction in ('vertical', 'both') and 0 <= y < size:
+            if 0 <= x < size: self._block(y * size + x, BLOCK_LEFT)
+            if 0 <= x - 1 < size: self._block(y * size + x - 1, BLOCK_RIGHT)
+
+    def _block(self, idx, bit):
+        self.masks[idx] |= bit
+        if self.closed_masks is not self.masks: self.closed_masks[idx] |= bit
+
+    def set_gate(self, gate):
+        """`gate` can be a dict with x/y, an (x, y) tuple, or None/{} for no gate."""
+        if isinstance(gate, dict): gate = (int(gate['x']), int(gate['y'])) if gate else None
+        self.gate = tuple(gate) if gate else None
+        self.closed_masks = self.masks
+        # Tables and graphs built for the old gate are stale
+        self.move_tables = {}
+        if self.gate:
+            gx, gy = self.gate
+            if 0 <= gx < self.size and 1 <= gy < self.size:
+                self.closed_masks = bytearray(self.masks)
+                self.closed_masks[gy * self.size + gx] |= BLOCK_UP
+                self.closed_masks[(gy - 1) * self.size + gx] |= BLOCK_DOWN
+
+    def with_gate(self, gate):
+        """Copy of this grid with the gate moved to `gate` (walls are shared)."""
+        grid = WallGrid.__new__(WallGrid)
+        grid.size, grid.masks, grid.move_tables = self.size, self.masks, {}
+        grid.set_gate(gate)
+        return grid
+
+    def get_masks(self, gate_open=True):
+        return self.masks if gate_open else self.closed_masks
+
+    @staticmethod
+    def direction_bit(x1, y1, x2, y2):
+        if x2 > x1: return BLOCK_RIGHT
+        if x2 < x1: return BLOCK_LEFT
+        if y2 > y1: return BLOCK_DOWN
+        if y2 < y1: return BLOCK_UP
+        return 0
+
+    def has_wall(self, x1, y1, x2, y2):
+        """Static walls only (no gate), same meaning as the old wall-list scan."""
+        return bool(self.masks[y1 * self.size + x1] & WallGrid.direction_bit(x1, y1, x2, y2))
+
+    def gate_blocks(self, x1, y1, x2, y2, gate_open=False):
+        if gate_open or not self.gate: return False
+        return bool(self.closed_masks[y1 * self.size + x1] & ~self.masks[y1 * self.size + x1]
+                    & WallGrid.direction_bit(x1, y1, x2, y2))
+
+    def can_move(self, x1, y1, x2, y2, gate_open=True):
+        if not (0 <= x2 < self.size and 0 <= y2 < self.size): return False
+        masks = self.masks if gate_open else self.closed_masks
+        return not (masks[y1 * self.size + x1] & WallGrid.direction_bit(x1, y1, x2, y2))
+
+    def neighbors(self, x, y, gate_open=True):
+        m = self.get_masks(gate_open)[y * self.size + x]
+        return [(x + dx, y + dy) for dx, dy, bit in DIRECTIONS if not m & bit]
+
+    def wall_top(self, x, y):
+        """True if a wall (not the map border) is drawn on the top edge of (x, y)."""
+        return y > 0 and bool(self.masks[y * self.size + x] & BLOCK_UP)
+
+    def wall_left(self, x, y):
+        return x > 0 and bool(self.masks[y * self.size + x] & BLOCK_LEFT)
@@ -0,0 +1,29 @@
+import os
+import sys
+import glob
+import time
+from pathlib import Path
+
+# Configure system path to include project root
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path: sys.path.insert(0, str(ROOT_DIR))
+
+from api.io.Lightning.utils.ConfigFile import LEVELS_PATH
+from api.io.Lightning.solver.TablebasePack import PackedTablebase
+
+def main(force=False):
+    """Writes (or refreshes) the .tb tablebase pack next to every campaign level."""
+    for level_path in sorted(glob.glob(os.path.join(LEVELS_PATH, 'level_*.json'))):
+        name = os.path.basename(level_path)
+        if not force and PackedTablebase.open_pack(level_path):
+            print(f"[Skip] {name}: pack is up to date")
+            continue
+        start = time.time()
+        tb = PackedTablebase.build_pack(level_path)
+        if tb is None:
+            print(f"[Warning] {name}: too many states, no pack written")
+        else:
+            print(f"[Info] {name}: {len(tb)} states in {time.time() - start:.2f}s")
+
+if __name__ == "__main__":
+    main(force="--force" in sys.argv)
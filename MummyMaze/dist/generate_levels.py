@@ -0,0 +1,153 @@
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+# Configure system path to include project root
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path: sys.path.insert(0, str(ROOT_DIR))
+
+from api.io.Lightning.utils.ConfigFile import PROJECT_PATH
+from api.io.Lightning.maze.WorkerPool import WorkerPool, BACKENDS
+from api.io.Lightning.maze.MazeGenerator import MazeGenerator
+from api.io.Lightning.maze.LevelRace import LevelRace, latency_summary
+from api.io.Lightning.solver.SolveCache import SolveCache
+from api.io.Lightning.solver.ParallelSolver import ParallelSolver
+
+DEFAULT_OUT = os.path.join(PROJECT_PATH, "data", "generated", "levels.jsonl")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate validated random levels on a worker pool.")
+    parser.add_argument("-n", "--count", type=int, default=10, help="levels per (size, difficulty)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[6, 8, 10])
+    parser.add_argument("--difficulties", nargs="+", choices=["easy", "medium", "hard"], default=["easy", "medium", "hard"])
+    parser.add_argument("--seed", type=int, default=0, help="job i of the batch uses seed + i")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="default: one per core")
+    parser.add_argument("--backend", choices=BACKENDS, default="process")
+    parser.add_argument("--analyze", action="store_true", help="also count the shortest solutions of each level")
+    parser.add_argument("--solver", choices=["worker", "parallel"], default="worker",
+                        help="parallel: re-check every level with the sharded BFS of ParallelSolver "
+                             "(bigger budget, exact length) before writing it")
+    parser.add_argument("--race", action="store_true",
+                        help="time sequential generate_level against LevelRace per level instead (nothing is written)")
+    parser.add_argument("-o", "--out", default=DEFAULT_OUT,
+                        help="a .jsonl file (one level per line) or a folder for level_N.json files")
+    return parser.parse_args(argv)
+
+
+def batch_jobs(sizes, difficulties, count, seed):
+    """(difficulty, size, seed) of every level, in output order."""
+    jobs = []
+    for size in sizes:
+        for difficulty in difficulties:
+            for _ in range(count): jobs.append((difficulty, size, seed + len(jobs)))
+    return jobs
+
+
+def level_record(result):
+    """What gets written for a result: the level plus its seed (and solution counts, checked length), no timings."""
+    record = dict(result['level'], seed=result['seed'])
+    if 'length' in result: record['length'] = result['length']
+    if result['solutions']:
+        record['solutions'] = {k: v for k, v in result['solutions'].items() if k != 'seconds'}
+    return record
+
+
+class LevelWriter:
+    """Writes records in order, either as lines of one .jsonl file or as level_N.json files in a folder."""
+    def __init__(self, out):
+        self.lines = out.endswith(".jsonl")
+        self.folder = os.path.dirname(out) if self.lines else out
+        if self.folder: os.makedirs(self.folder, exist_ok=True)
+        self.file = open(out, "w") if self.lines else None
+        self.written = 0
+
+    def write(self, record):
+        self.written += 1
+        if self.lines:
+            self.file.write(json.dumps(record) + "\n")
+        else:
+            with open(os.path.join(self.folder, f"level_{self.written}.json"), "w") as f:
+                f.write(json.dumps(record, indent=2) + "\n")
+
+    def close(self):
+        if self.file: self.file.close()
+
+
+def verify(verifier, result):
+    """Re-solves a generated level on the sharded BFS; sets its exact `length`, or `error` if it is not proven."""
+    check = verifier.bfs(result['level'], result['size'], result['difficulty'])
+    if check.solved: result['length'] = check.length
+    else: result['error'] = f"parallel check: {check.status.value}"
+
+
+def report(workers, elapsed, written, failed):
+    print(f"[Info] {written} levels written, {failed} failed, {elapsed:.1f}s ({written / max(elapsed, 1e-9):.2f} levels/s)")
+    for worker, (done, busy) in sorted(workers.items()):
+        print(f"[Info]   worker {worker}: {done} jobs, {busy:.1f}s busy, {done / max(busy, 1e-9):.2f} jobs/s")
+
+
+def format_latency(name, summary):
+    if not summary['count']: return f"[Info] {name}: no samples"
+    return (f"[Info] {name}: {summary['count']} levels, p50 {summary['p50'] * 1000:.0f} ms, "
+            f"p90 {summary['p90'] * 1000:.0f} ms, p99 {summary['p99'] * 1000:.0f} ms, max {summary['max'] * 1000:.0f} ms")
+
+
+def race(args, jobs):
+    """Time-to-level of every job, generated in place and then raced, as two latency distributions."""
+    sequential = []
+    for difficulty, size, seed in jobs:
+        start = time.perf_counter()
+        MazeGenerator(cache=SolveCache(path=None), seed=seed, verbose=False).generate_level(difficulty, size)
+        sequential.append(time.perf_counter() - start)
+    with WorkerPool(args.workers, args.backend) as pool:
+        racer = LevelRace(pool, seed=args.seed)
+        # Worker start-up happens in the menus in the game, keep it out of the numbers
+        racer.warm()
+        time.sleep(1.0)
+        for difficulty, size, _ in jobs: racer.generate(difficulty, size)
+    print(format_latency("sequential", latency_summary(sequential)))
+    print(format_latency("race", racer.summary()))
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    jobs = batch_jobs(args.sizes, args.difficulties, args.count, args.seed)
+    if args.race: return race(args, jobs)
+    writer = LevelWriter(args.out)
+    workers = {}  # worker id -> [jobs, busy seconds]
+    failed = 0
+    progress = ""
+    start = time.time()
+    print(f"[System] {len(jobs)} levels on {args.workers or os.cpu_count()} {args.backend} workers -> {args.out}")
+    verifier = ParallelSolver(args.workers) if args.solver == "parallel" else None
+    try:
+        with WorkerPool(args.workers, args.backend) as pool:
+            for done, result in enumerate(pool.generate_batch(jobs, args.analyze), 1):
+                stat = workers.setdefault(result['worker'], [0, 0.0])
+                stat[0] += 1; stat[1] += result['seconds']
+                if verifier and not result['error']: verify(verifier, result)
+                if result['error']:
+                    failed += 1
+                    # Written over the progress line, which is redrawn below it
+                    warning = f"[Warning] seed {result['seed']} ({result['difficulty']}, size {result['size']}): {result['error']}"
+                    print("\r" + warning.ljust(len(progress)))
+                else:
+                    writer.write(level_record(result))
+                elapsed = time.time() - start
+                progress = f"[Info] {done}/{len(jobs)} done, {failed} failed, {done / max(elapsed, 1e-9):.2f} levels/s"
+                print("\r" + progress, end="", flush=True)
+    finally:
+        if verifier: verifier.close()
+        writer.close()
+        print()
+    report(workers, time.time() - start, writer.written, failed)
+    return 0 if writer.written else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
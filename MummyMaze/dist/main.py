@@ -18,6 +18,8 @@ from api.io.Lightning.manager.SoundReader import music_manager
 from api.io.Lightning.manager.StorageManager import storage_manager
 from api.io.Lightning.manager.TextDesigner import TextDesigner
 from api.io.Lightning.gui.Leaderboard import leaderboard_screen
+from api.io.Lightning.maze.LevelRace import LevelRace
+from api.io.Lightning.maze.LevelPool import LevelPool
 
 # Define Application States
 STATE_LOGIN = "LOGIN"; STATE_MENU = "MENU"; STATE_RANDOM_CFG = "RANDOM_CFG"
@@ -39,14 +41,16 @@ def random_config_screen(screen, clock, mouse_pos, clicked):
     for i, s in enumerate(sizes):
         col = (255, 215, 0) if ctx["size"] == s else (200, 200, 200)
         td = TextDesigner(color=col)
-        if td.draw_button(screen, f"{s}x{s}", 260 + i*120, 140, mouse_pos, clicked): ctx["size"] = s
+        if td.draw_button(screen, f"{s}x{s}", 260 + i*120, 140, mouse_pos, clicked):
+            ctx["size"] = s; LevelPool.shared().want(ctx["size"], ctx["difficulty"])
 
     gd.render_default("MODE:", screen, 100, 240)
     diffs = ["easy", "medium", "hard"]
     for i, d in enumerate(diffs):
         col = (255, 215, 0) if ctx["difficulty"] == d else (200, 200, 200)
         td = TextDesigner(color=col)
-        if td.draw_button(screen, d.upper(), 260 + i*120, 240, mouse_pos, clicked): ctx["difficulty"] = d
+        if td.draw_button(screen, d.upper(), 260 + i*120, 240, mouse_pos, clicked):
+            ctx["difficulty"] = d; LevelPool.shared().want(ctx["size"], ctx["difficulty"])
 
     if wd.draw_button(screen, "START GAME", 320, 380, mouse_pos, clicked):
         pygame.event.clear()
@@ -146,6 +150,8 @@ def main():
 
             elif act == "classic_mode": 
                 state = STATE_RANDOM_CFG
+                # Workers start while the player picks size and difficulty
+                LevelRace.shared().warm()
                 pygame.event.clear()
             elif act == "campaign_mode": 
                 state = STATE_CAMPAIGN_SEL
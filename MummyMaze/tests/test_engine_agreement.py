@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Configure system path to include project root
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path: sys.path.insert(0, str(ROOT_DIR))
+
+from api.io.Lightning.maze.MazeGenerator import MazeGenerator
+from api.io.Lightning.solver.LevelModel import LevelModel, ACTIONS
+from api.io.Lightning.solver.LevelSolver import LevelSolver, SolveStatus
+from api.io.Lightning.solver.ParallelSolver import ParallelSolver
+from api.io.Lightning.solver.SolveCache import SolveCache
+from api.io.Lightning.solver.Tablebase import Tablebase, LOST
+from api.io.Lightning.solver.VectorSolver import VectorSolver
+
+SEEDS = range(6)
+SETTINGS = ((6, 'easy'), (8, 'medium'), (10, 'hard'))
+
+
+def raw_level(seed, size, difficulty):
+    """An unvalidated random layout, so unsolvable levels are covered too."""
+    generator = MazeGenerator(cache=SolveCache(path=None), seed=seed, verbose=False)
+    config = generator._get_config(difficulty)
+    layout = generator._generate_layout(size)
+    generator._braid_maze(layout, size, config['braid_factor'])
+    walls = generator._smart_prune_walls(generator._get_raw_walls(layout, size), size, config['wall_density'])
+    level = generator._place_entities(size, walls, config)
+    if level: level['walls'] = generator._merge_walls(level['walls'])
+    return level
+
+
+LEVELS = [(seed, size, difficulty, raw_level(seed, size, difficulty))
+          for seed in SEEDS for size, difficulty in SETTINGS]
+LEVELS = [case for case in LEVELS if case[3]]
+
+
+@pytest.fixture(scope="module")
+def parallel():
+    with ParallelSolver(2) as solver: yield solver
+
+
+@pytest.mark.parametrize("seed,size,difficulty,level", LEVELS,
+                         ids=[f"{d}-{s}-seed{seed}" for seed, s, d, _ in LEVELS])
+def test_engines_agree(seed, size, difficulty, level, parallel):
+    """Every engine gives the bfs verdict and, when solved, its shortest length."""
+    expected = LevelSolver.for_level(level, size, difficulty).bfs()
+    assert expected.proven
+
+    def model(): return LevelModel(level, size, difficulty)
+    results = {
+        'astar': LevelSolver(model()).solve(),
+        'ida': LevelSolver(model()).ida(),
+        'parallel': parallel.bfs(level, size, difficulty),
+    }
+    if VectorSolver.supports(model()): results['vector'] = VectorSolver(model()).bfs()
+    for mode, result in results.items():
+        assert (result.status, result.length) == (expected.status, expected.length), mode
+
+    beam = LevelSolver(model()).beam()
+    if beam.solved:
+        assert expected.solved and beam.length >= expected.length
+
+    table = Tablebase.build(model())
+    if table is not None:
+        dist = table.distance(table.model.start)
+        assert dist == (expected.length if expected.solved else LOST)
+
+
+@pytest.mark.parametrize("seed,size,difficulty,level", LEVELS,
+                         ids=[f"{d}-{s}-seed{seed}" for seed, s, d, _ in LEVELS])
+def test_solution_replays_through_step(seed, size, difficulty, level):
+    """The moves A* returns win when played through the rules core, in exactly `length` turns."""
+    rules = LevelModel(level, size, difficulty)
+    result = LevelSolver(rules).solve()
+    if result.status != SolveStatus.SOLVED: return
+    key = rules.start
+    for i, move in enumerate(result.moves):
+        assert not rules.is_win(key)
+        key, _ = rules.step(key, ACTIONS.index(move))
+        assert key is not None, f"move {i} {move} loses"
+    assert rules.is_win(key)
+    assert len(result.moves) == result.length